@@ -0,0 +1,186 @@
+"""
+Local JSON API for portfolio analytics over stored ledgers.
+
+Ledgers are read from LEDGER_DIR (default data/ledgers), one CSV, Parquet or
+Arrow file per ledger, named by file stem. All endpoints are GET:
+
+    /health
+    /stats
+    /ledgers
+    /ledgers/<name>/holdings
+    /ledgers/<name>/xirr[?symbol=SYM]
+    /ledgers/<name>/mirr[?symbol=SYM&finance_rate=0.1&reinvest_rate=0.1]
+    /ledgers/<name>/twr[?symbol=SYM]
+    /ledgers/<name>/holding-time[?symbol=SYM]
+    /ledgers/<name>/symbols
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8765] [--ledgers DIR] [--workers N]
+"""
+import argparse
+import asyncio
+import json
+import math
+import traceback
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+from utils.api_service import AnalyticsService
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+FLOAT_PARAMS = ('finance_rate', 'reinvest_rate')
+
+def _jsonable(value):
+    """Convert NumPy scalars to Python values and non-finite floats to None"""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _parse_params(query):
+    """Metric parameters from a query string"""
+    params = {}
+    for key, value in parse_qsl(query):
+        if key == 'symbol':
+            params['symbol'] = value.strip().upper()
+        elif key in FLOAT_PARAMS:
+            params[key] = float(value)
+    return params
+
+async def route(service, method, target):
+    """
+    Dispatch one request.
+
+    Returns:
+        tuple: (HTTP status, JSON-serializable body)
+    """
+    if method != 'GET':
+        return 405, {'error': 'Only GET is supported'}
+
+    url = urlsplit(target)
+    parts = [part for part in url.path.split('/') if part]
+
+    if parts == ['health']:
+        return 200, {'status': 'ok'}
+    if parts == ['stats']:
+        return 200, dict(service.stats, cached_results=len(service.results), quote_cache=service.quote_cache.stats())
+    if parts == ['ledgers']:
+        return 200, {'ledgers': service.list_ledgers()}
+
+    if len(parts) == 3 and parts[0] == 'ledgers':
+        try:
+            params = _parse_params(url.query)
+        except ValueError as e:
+            return 400, {'error': f"Invalid parameter: {str(e)}"}
+
+        success, result = await service.compute(parts[1], parts[2], params)
+        if success:
+            return 200, {'ledger': parts[1], 'metric': parts[2], **params, 'value': result}
+        status = 404 if result.startswith(('Ledger not found', 'Unknown metric')) else 400
+        return status, {'error': result}
+
+    return 404, {'error': f"Not found: {url.path}"}
+
+async def handle_connection(service, reader, writer):
+    """Serve HTTP/1.1 requests on one connection, keeping it open between requests"""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ')
+            except ValueError:
+                break
+            headers = dict(
+                (name.strip().lower(), value.strip())
+                for name, _, value in (line.partition(':') for line in lines[1:] if line)
+            )
+
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+            # Request bodies are not used by any endpoint; discard them
+            try:
+                length = int(headers.get('content-length', 0) or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # The body cannot be skipped, so answer and close the connection
+                status, body = 400, {'error': 'Invalid Content-Length header'}
+                keep_alive = False
+            else:
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                try:
+                    status, body = await route(service, method, target)
+                except Exception as e:
+                    traceback.print_exc()
+                    status, body = 500, {'error': f"Internal error: {str(e)}"}
+
+            payload = json.dumps(_jsonable(body)).encode()
+
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """
+    Run the API server until cancelled.
+
+    Args:
+        service: AnalyticsService answering the requests
+        host: Interface to bind
+        port: Port to bind
+        ready: Optional callable invoked once the socket is listening
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port
+    )
+    if ready is not None:
+        ready()
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--ledgers', default=None, help='Directory of stored ledgers')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for metric solves')
+    args = parser.parse_args()
+
+    service = AnalyticsService(args.ledgers, workers=args.workers)
+    print(f"Serving ledgers from {service.ledger_dir} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == '__main__':
+    main()
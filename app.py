@@ -1,7 +1,4 @@
 import streamlit as st
-from components.portfolio_input import show_input_section
-from components.portfolio_view import show_portfolio_view
-from components.portfolio_analysis import show_analysis_section
 
 st.set_page_config(
     page_title="Portfolio Performance Tracker",
@@ -19,16 +16,21 @@ def main():
     # Create tabs for different sections
     tab1, tab2, tab3 = st.tabs(["Input Transactions", "View Portfolio", "Analysis"])
     
+    # Each tab's component (and its dependencies) is imported only when the tab
+    # is rendered, so the input form is drawn before the analysis stack loads
     with tab1:
         with st.spinner('Loading Input Transactions...'):
+            from components.portfolio_input import show_input_section
             show_input_section()
     
     with tab2:
         with st.spinner('Loading Portfolio View...'):
+            from components.portfolio_view import show_portfolio_view
             show_portfolio_view()
     
     with tab3:
         with st.spinner('Loading Analysis...'):
+            from components.portfolio_analysis import show_analysis_section
             show_analysis_section()
 
 if __name__ == "__main__":
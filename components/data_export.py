@@ -0,0 +1,23 @@
+import streamlit as st
+from utils.data_manager import export_dataframe, EXPORT_FORMATS
+
+def show_export_buttons(df, file_stem, key, label="Export"):
+    """Render download buttons for each export format once the user asks to export"""
+    # Serializing large frames is not free, so only do it on request
+    if not st.checkbox(label, key=f"{key}_export"):
+        return
+    
+    columns = st.columns(len(EXPORT_FORMATS))
+    for column, (format_name, (extension, mime)) in zip(columns, EXPORT_FORMATS.items()):
+        with column:
+            success, data = export_dataframe(df, extension)
+            if success:
+                st.download_button(
+                    f"Download {format_name}",
+                    data=data,
+                    file_name=f"{file_stem}.{extension}",
+                    mime=mime,
+                    key=f"{key}_{extension}"
+                )
+            else:
+                st.error(data)
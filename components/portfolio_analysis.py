@@ -1,19 +1,26 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
-from utils.data_manager import get_transactions
+import numpy as np
+from utils.data_manager import get_transactions, get_portfolio_timeline, get_xirr_solver_cache, get_benchmark_prices
 from utils.calculations import (
-    calculate_xirr, 
     calculate_portfolio_value, 
-    calculate_xirr_with_multiple_guesses, 
-    calculate_mirr, 
-    calculate_twr,
+    calculate_mirr_surface,
+    calculate_mirr_surfaces_by_symbol,
     calculate_weighted_holding_time
 )
-from utils.stock_api import get_current_price, get_historical_prices
+from utils.timeline import timeline_twr
+from utils.price_store import open_price_store, ingest_price_history
+from components.data_export import show_export_buttons
+from utils.symbol_analytics import calculate_symbol_metrics, default_worker_count
+from utils.xirr_solver import calculate_xirr_incremental
+from utils.stock_api import get_current_price, get_historical_prices, get_price_matrix
+from utils.simulation import project_portfolio
+from utils.risk import calculate_portfolio_risk
+from utils.benchmark import compare_to_benchmarks
 
 def show_analysis_section():
+    import plotly.graph_objects as go
+
     st.header("Portfolio Analysis")
     
     with st.spinner("Loading transactions..."):
@@ -36,19 +43,34 @@ def show_analysis_section():
                 st.error("Start date is invalid. Please provide a valid start date.")
                 return
             
-            dates = pd.date_range(start=start_date, end=pd.Timestamp.now(), freq='D')
-            portfolio_values = []
+            timeline = get_portfolio_timeline(current_prices)
+            dates = timeline['value'].index
+            portfolio_values = timeline['value'].values
             
-            for date in dates:
-                transactions_till_date = transactions_df[transactions_df['Date'] <= date]
-                if not transactions_till_date.empty:
-                    portfolio_value = calculate_portfolio_value(
-                        transactions_till_date,
-                        current_prices
-                    )['Current Value'].sum()
-                    portfolio_values.append(portfolio_value)
+            benchmark_input = st.text_input(
+                "Compare with benchmarks",
+                value="",
+                placeholder="e.g. VOO, QQQ",
+                help="Comma-separated symbols. Each line shows what the portfolio would be worth "
+                     "if every buy and sell had been made in the benchmark instead."
+            )
+            benchmarks = list(dict.fromkeys(
+                symbol.strip().upper() for symbol in benchmark_input.split(',') if symbol.strip()
+            ))
+            pme = None
+            if benchmarks:
+                with st.spinner("Fetching benchmark history..."):
+                    success, result = get_benchmark_prices(benchmarks, start_date)
+                if not success:
+                    st.error(result)
                 else:
-                    portfolio_values.append(0)
+                    benchmark_prices, missing = result
+                    if missing:
+                        st.warning(f"No price history for: {', '.join(missing)}")
+                    if not benchmark_prices.empty:
+                        pme = compare_to_benchmarks(
+                            transactions_df, benchmark_prices, dates, total_portfolio_value
+                        )
             
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -57,19 +79,72 @@ def show_analysis_section():
                 mode='lines',
                 name='Portfolio Value'
             ))
+            if pme is not None:
+                for benchmark in pme['values'].columns:
+                    fig.add_trace(go.Scatter(
+                        x=dates,
+                        y=pme['values'][benchmark].values,
+                        mode='lines',
+                        line={'dash': 'dot'},
+                        name=f'{benchmark} equivalent'
+                    ))
             fig.update_layout(
                 title='Portfolio Value Over Time',
                 xaxis_title='Date',
                 yaxis_title='Value'
             )
             st.plotly_chart(fig) 
+            
+            if pme is not None:
+                pme_df = pd.DataFrame({
+                    'Benchmark': pme['values'].columns,
+                    'Equivalent Value': pme['values'].iloc[-1].values,
+                    'Benchmark XIRR': [pme['xirr'][b] for b in pme['values'].columns],
+                    'KS-PME': [pme['ks_pme'][b] for b in pme['values'].columns]
+                })
+                st.dataframe(
+                    pme_df.style.format({
+                        'Equivalent Value': '{:,.2f}',
+                        'Benchmark XIRR': lambda rate: f"{rate*100:.2f}%" if pd.notna(rate) else "N/A",
+                        'KS-PME': lambda ratio: f"{ratio:.2f}" if pd.notna(ratio) else "N/A"
+                    }),
+                    hide_index=True
+                )
+                st.caption("A KS-PME above 1 means the portfolio outperformed the benchmark on the same cash flows.")
+            
+            price_store = open_price_store()
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                if price_store is not None:
+                    st.caption(
+                        f"Valued at historical closes from the local price store "
+                        f"({len(price_store.symbols)} symbols through {price_store.dates[-1]})."
+                    )
+                else:
+                    st.caption("Valued at current prices. Build the local price store to use historical closes.")
+            with col2:
+                if st.button("Update price store"):
+                    with st.spinner("Fetching price history..."):
+                        success, result = ingest_price_history(
+                            list(transactions_df['Symbol'].unique()),
+                            pd.Timestamp(start_date).strftime('%Y-%m-%d')
+                        )
+                    if not success:
+                        st.error(result)
+                    else:
+                        if result:
+                            st.warning(f"No price history for: {', '.join(result)}")
+                        st.rerun()
     
     # Calculate overall XIRR and simple return
     with st.spinner("Calculating overall returns..."):
+        overall_xirr = None
         try:
-            overall_xirr = calculate_xirr_with_multiple_guesses(transactions_df)
+            overall_xirr = calculate_xirr_incremental(
+                transactions_df, get_xirr_solver_cache(), current_prices, account='session'
+            )
         except Exception as e:
-            st.warning(f"Could not calculate XIRR with multiple guesses: {str(e)}")
+            st.warning(f"Could not calculate XIRR with the incremental solver: {str(e)}")
             # Try MIRR as fallback
             # try:
             #     overall_mirr = calculate_mirr(transactions_df)
@@ -123,7 +198,8 @@ def show_analysis_section():
         overall_annualized_return = ((1 + (overall_total_return / 100)) ** (1 / holding_time_years)) - 1
     
     if overall_xirr is not None:
-        col1, col2, col3, col4 = st.columns(4)
+        overall_twr = timeline_twr(timeline)
+        col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
             st.metric("Portfolio XIRR", f"{overall_xirr*100:.2f}%")
         with col2:
@@ -138,86 +214,226 @@ def show_analysis_section():
                 st.metric("Weighted Avg Holding Time", f"{overall_holding_time:.1f} days")
             else:
                 st.metric("Weighted Avg Holding Time", "N/A")
+        with col5:
+            if overall_twr is not None:
+                st.metric("Time-Weighted Return", f"{overall_twr*100:.2f}%")
+            else:
+                st.metric("Time-Weighted Return", "N/A")
         
     
     # Calculate individual stock XIRR and simple returns
     st.subheader("Stock-wise Returns")
+    workers = st.number_input(
+        "Worker processes",
+        min_value=1,
+        max_value=256,
+        value=min(default_worker_count(), 256),
+        help="Symbols are split across this many processes; 1 computes serially."
+    )
+    with st.spinner(f"Calculating returns for {transactions_df['Symbol'].nunique()} symbols..."):
+        # Warm-start each symbol's solver from its last converged XIRR
+        symbol_xirr_rates = st.session_state.setdefault('symbol_xirr_rates', {})
+        symbol_metrics = calculate_symbol_metrics(
+            transactions_df, current_prices, int(workers), xirr_guesses=symbol_xirr_rates
+        )
+        symbol_xirr_rates.update(
+            (metrics['Symbol'], metrics['XIRR']) for metrics in symbol_metrics if metrics['XIRR'] is not None
+        )
+    
     stock_return_data = []
-    for symbol in transactions_df['Symbol'].unique():
-        with st.spinner(f"Calculating returns for {symbol}..."):
-            # XIRR calculation with fallbacks
-            return_value = None
-            return_type = "XIRR"
-            
-            try:
-                # First try XIRR with multiple guesses
-                stock_df = transactions_df[transactions_df['Symbol'] == symbol]
-                xirr = calculate_xirr_with_multiple_guesses(transactions_df, symbol)
-                
-                if xirr is not None:
-                    return_value = xirr
-                # else:
-                #     # Try MIRR as first fallback
-                #     try:
-                #         mirr = calculate_mirr(stock_df)
-                #         if mirr is not None:
-                #             return_value = mirr
-                #             return_type = "MIRR"
-                #         else:
-                #             # Try TWR as second fallback
-                #             try:
-                #                 symbol_prices = {symbol: current_prices.get(symbol, 0)}
-                #                 twr = calculate_twr(stock_df, symbol_prices)
-                #                 if twr is not None:
-                #                     return_value = twr
-                #                     return_type = "TWR"
-                #             except Exception as e3:
-                #                 pass
-                #     except Exception as e2:
-                #         pass
-            except Exception as e:
-                st.warning(f"Could not calculate returns for {symbol}: {str(e)}")
-            
-            # Simple return calculation
-            stock_df = transactions_df[transactions_df['Symbol'] == symbol]
-            total_quantity = stock_df['Quantity'].sum()
-            total_cost = (stock_df['Quantity'] * stock_df['Price']).sum()
-            
-            if total_quantity > 0:
-                avg_cost = total_cost / total_quantity
-                current_price = current_prices.get(symbol, 0)
-                total_return = ((current_price / avg_cost) - 1) * 100
-            else:
-                avg_cost = 0
-                current_price = current_prices.get(symbol, 0)
-                total_return = 0
-            
-            # Calculate weighted average holding time for this stock
-            stock_holding_time = calculate_weighted_holding_time(transactions_df, symbol)
-            
-            # Calculate annualized return for this stock
-            annualized_return = None
-            if stock_holding_time is not None and stock_holding_time > 0 and total_return != 0:
-                # Convert holding time from days to years
-                holding_time_years = stock_holding_time / 365.0
-                # Calculate annualized return using the formula: (1 + Return)^(1/N) - 1
-                annualized_return = ((1 + (total_return / 100)) ** (1 / holding_time_years)) - 1
-            
-            # Add to results with whatever return calculation succeeded
-            stock_return_data.append({
-                'Symbol': symbol,
-                'Avg Cost': f"{avg_cost:.2f}",
-                'Current Price': f"{current_price:.2f}",
-                'Avg Holding Time': f"{stock_holding_time:.1f} days" if stock_holding_time is not None else "N/A",
-                'Total Return': f"{total_return:.2f}%",
-                'Annualized Return': f"{annualized_return*100:.2f}%" if annualized_return is not None else "N/A",
-                'XIRR': f"{return_value*100:.2f}%" if return_value is not None else "N/A"  
-            })
+    for metrics in symbol_metrics:
+        stock_holding_time = metrics['Avg Holding Time']
+        annualized_return = metrics['Annualized Return']
+        return_value = metrics['XIRR']
+        stock_return_data.append({
+            'Symbol': metrics['Symbol'],
+            'Avg Cost': f"{metrics['Avg Cost']:.2f}",
+            'Current Price': f"{metrics['Current Price']:.2f}",
+            'Avg Holding Time': f"{stock_holding_time:.1f} days" if stock_holding_time is not None else "N/A",
+            'Total Return': f"{metrics['Total Return']:.2f}%",
+            'Annualized Return': f"{annualized_return*100:.2f}%" if annualized_return is not None else "N/A",
+            'XIRR': f"{return_value*100:.2f}%" if return_value is not None else "N/A"  
+        })
     
     if stock_return_data:
         stock_return_df = pd.DataFrame(stock_return_data)
         st.dataframe(stock_return_df, hide_index=True)
+        show_export_buttons(
+            pd.DataFrame(symbol_metrics).astype({'Avg Holding Time': float, 'Annualized Return': float, 'XIRR': float}),
+            "stock_returns", "stock_returns", "Export stock-wise returns"
+        )
+    
+    # MIRR Sensitivity Section
+    st.subheader("MIRR Sensitivity")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        finance_range = st.slider(
+            "Finance rate range (%)", min_value=-20.0, max_value=50.0,
+            value=(0.0, 20.0), step=0.5
+        )
+    with col2:
+        reinvest_range = st.slider(
+            "Reinvest rate range (%)", min_value=-20.0, max_value=50.0,
+            value=(0.0, 20.0), step=0.5
+        )
+    with col3:
+        grid_size = st.number_input("Grid points per axis", min_value=2, max_value=200, value=50)
     
+    with st.spinner("Calculating MIRR sensitivity..."):
+        finance_rates = np.linspace(finance_range[0], finance_range[1], int(grid_size)) / 100
+        reinvest_rates = np.linspace(reinvest_range[0], reinvest_range[1], int(grid_size)) / 100
+        
+        mirr_surfaces = {
+            'Portfolio': calculate_mirr_surface(
+                transactions_df, finance_rates, reinvest_rates, current_prices=current_prices
+            )
+        }
+        symbols, symbol_surfaces = calculate_mirr_surfaces_by_symbol(
+            transactions_df, finance_rates, reinvest_rates, current_prices
+        )
+        mirr_surfaces.update(zip(symbols, symbol_surfaces))
+        
+        surface_choice = st.selectbox("Show MIRR surface for:", list(mirr_surfaces.keys()))
+        fig = go.Figure(go.Heatmap(
+            z=mirr_surfaces[surface_choice] * 100,
+            x=reinvest_rates * 100,
+            y=finance_rates * 100,
+            colorscale='RdYlGn',
+            colorbar={'title': 'MIRR (%)'},
+            hovertemplate='Reinvest: %{x:.2f}%<br>Finance: %{y:.2f}%<br>MIRR: %{z:.2f}%<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f'MIRR Sensitivity for {surface_choice}',
+            xaxis_title='Reinvest Rate (%)',
+            yaxis_title='Finance Rate (%)'
+        )
+        st.plotly_chart(fig)
+
+    # Monte Carlo Projection Section
+    st.subheader("Monte Carlo Projection")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        n_paths = st.number_input("Paths", min_value=100, max_value=100000, value=10000, step=1000)
+    with col2:
+        projection_years = st.number_input("Years", min_value=1, max_value=50, value=10)
+    with col3:
+        lookback_years = st.number_input("History (years)", min_value=1, max_value=20, value=5)
+    with col4:
+        steps = st.selectbox("Steps", ["Annual", "Monthly"])
+
+    if st.button("Run simulation"):
+        portfolio_df = calculate_portfolio_value(transactions_df, current_prices)
+        history_start = (pd.Timestamp.now() - pd.DateOffset(years=int(lookback_years))).strftime('%Y-%m-%d')
+        with st.spinner("Fetching price history..."):
+            success, result = get_price_matrix(list(portfolio_df['Symbol']), history_start)
+        if success:
+            price_matrix, _ = result
+            with st.spinner(f"Simulating {int(n_paths):,} paths..."):
+                success, result = project_portfolio(
+                    portfolio_df, price_matrix,
+                    years=int(projection_years), n_paths=int(n_paths),
+                    steps_per_year=1 if steps == "Annual" else 12
+                )
+        if success:
+            st.session_state['monte_carlo'] = result
+        else:
+            st.error(result)
+
+    simulation = st.session_state.get('monte_carlo')
+    if simulation is not None:
+        horizon = pd.Timestamp.now().normalize() + pd.to_timedelta(simulation['times'] * 365.25, unit='D')
+        bands = simulation['bands']
+        fig = go.Figure()
+        for low, high in [(5, 95), (25, 75)]:
+            fig.add_trace(go.Scatter(x=horizon, y=bands[high], mode='lines', line={'width': 0}, showlegend=False))
+            fig.add_trace(go.Scatter(
+                x=horizon, y=bands[low], mode='lines', line={'width': 0}, fill='tonexty',
+                fillcolor='rgba(31, 119, 180, 0.2)', name=f'{low}th-{high}th percentile'
+            ))
+        fig.add_trace(go.Scatter(x=horizon, y=bands[50], mode='lines', name='Median'))
+        fig.update_layout(
+            title='Projected Portfolio Value',
+            xaxis_title='Date',
+            yaxis_title='Value ($)'
+        )
+        st.plotly_chart(fig)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Median Outcome", f"${bands[50][-1]:,.2f}")
+        with col2:
+            st.metric("5th Percentile", f"${bands[5][-1]:,.2f}")
+        with col3:
+            st.metric("Chance of Loss", f"{np.mean(simulation['terminal'] < simulation['initial'])*100:.1f}%")
+        if simulation['excluded']:
+            st.caption(f"Excluded (no current value or price history): {', '.join(simulation['excluded'])}")
+
+    # Risk Section
+    st.subheader("Risk")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        risk_window = st.number_input("History (days)", min_value=30, max_value=3650, value=365, step=30)
+    with col2:
+        confidence = st.selectbox("VaR confidence", [0.90, 0.95, 0.99], index=1, format_func=lambda c: f"{c:.0%}")
+    with col3:
+        horizon_days = st.number_input("VaR horizon (trading days)", min_value=1, max_value=250, value=1)
+
+    if st.button("Calculate risk"):
+        with st.spinner("Estimating covariance..."):
+            success, result = calculate_portfolio_risk(
+                calculate_portfolio_value(transactions_df, current_prices),
+                window_days=int(risk_window), confidence=confidence, horizon_days=int(horizon_days)
+            )
+        if success:
+            st.session_state['portfolio_risk'] = result
+        else:
+            st.error(result)
+
+    risk = st.session_state.get('portfolio_risk')
+    if risk is not None:
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Volatility (annual)", f"{risk['volatility']*100:.2f}%")
+        with col2:
+            st.metric("Historical VaR", f"${risk['historical_var']:,.2f}")
+        with col3:
+            st.metric("Historical CVaR", f"${risk['historical_cvar']:,.2f}")
+        with col4:
+            st.metric("Parametric VaR", f"${risk['parametric_var']:,.2f}")
+        with col5:
+            st.metric("Parametric CVaR", f"${risk['parametric_cvar']:,.2f}")
+
+        risk_df = pd.DataFrame({
+            'Symbol': risk['symbols'],
+            'Weight': risk['weights'] * 100,
+            'Volatility': risk['symbol_volatility'] * 100,
+            'Marginal Risk': risk['marginal'] * 100,
+            'Risk Contribution': risk['contribution'] * 100
+        }).sort_values('Risk Contribution', ascending=False)
+        st.dataframe(
+            risk_df.style.format({
+                'Weight': '{:.2f}%',
+                'Volatility': '{:.2f}%',
+                'Marginal Risk': '{:.2f}%',
+                'Risk Contribution': '{:.2f}%'
+            }),
+            hide_index=True
+        )
+
+        fig = go.Figure(go.Heatmap(
+            z=risk['corr'],
+            x=risk['symbols'],
+            y=risk['symbols'],
+            zmin=-1,
+            zmax=1,
+            colorscale='RdBu',
+            reversescale=True
+        ))
+        fig.update_layout(title='Return Correlation')
+        st.plotly_chart(fig)
+        if risk['excluded']:
+            st.caption(f"Excluded (no current value or price history): {', '.join(risk['excluded'])}")
+
     # Benchmark Analysis Section
     st.subheader("Benchmark Analysis")
     
@@ -289,6 +505,8 @@ def show_analysis_section():
                     
                     # Create a bar chart for annualized returns
                     try:
+                        import plotly.express as px
+
                         fig = px.bar(
                             benchmark_df, 
                             x='Period', 
@@ -1,6 +1,7 @@
 import streamlit as st
-from utils.data_manager import save_transaction, validate_csv_file
-from utils.stock_api import validate_symbol, get_current_price
+from utils.data_manager import save_transaction, validate_ledger_file, replace_transactions, merge_transactions
+from utils.stock_api import get_current_price
+from utils.symbol_master import validate_symbol_offline_first, validate_symbols, suggest_symbols
 from datetime import datetime
 import pandas as pd
 
@@ -22,8 +23,8 @@ def show_input_section():
             
             if submitted:
                 if symbol and quantity > 0 and price > 0:
-                    # Validate symbol
-                    valid_symbol, msg = validate_symbol(symbol)
+                    # Validate symbol against the local symbol master, then the provider
+                    valid_symbol, msg = validate_symbol_offline_first(symbol)
                     if valid_symbol:
                         success, msg = save_transaction(
                             symbol, date, trans_type, quantity, price
@@ -40,12 +41,17 @@ def show_input_section():
                             st.error(msg)
                     else:
                         st.error(msg)
+                        suggestions = suggest_symbols(symbol[:max(1, len(symbol) - 1)])
+                        if suggestions:
+                            st.info("Did you mean: " + ", ".join(
+                                f"{s} ({name})" if name else s for s, name in suggestions
+                            ))
                 else:
                     st.error("Please fill in all fields correctly.")
     
     with col2:
-        st.subheader("CSV Upload")
-        st.write("Upload a CSV file with columns: Symbol, Date, Type, Quantity, Price")
+        st.subheader("File Upload")
+        st.write("Upload a CSV, Parquet or Arrow file with columns: Symbol, Date, Type, Quantity, Price")
         
         # Add sample CSV structure as a DataFrame
         sample_data = {
@@ -59,31 +65,86 @@ def show_input_section():
         st.write("Sample Format:")
         st.dataframe(sample_df, hide_index=True)
         
-        uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+        uploaded_file = st.file_uploader(
+            "Choose a file", type=["csv", "parquet", "arrow", "feather"]
+        )
+        if 'import_mode' not in st.session_state:
+            # Default chosen once; a keyed widget keeps the user's choice afterwards
+            has_ledger = st.session_state.get('transactions_df') is not None and not st.session_state.transactions_df.empty
+            st.session_state['import_mode'] = "Merge new rows" if has_ledger else "Replace ledger"
+        import_mode = st.radio(
+            "Import mode",
+            ["Merge new rows", "Replace ledger"],
+            key='import_mode',
+            horizontal=True,
+            help="Merge adds only rows that are not already in the ledger, so a full broker history can be re-imported safely."
+        )
+        include_conflicts = st.checkbox(
+            "Also import rows that conflict with existing trades",
+            value=False,
+            key='import_include_conflicts',
+            disabled=import_mode != "Merge new rows",
+            help="A conflict is a new row with the same symbol, date and type as an existing trade but a different quantity or price."
+        )
 
         
         if uploaded_file is not None:
-            success, result = validate_csv_file(uploaded_file)
+            # Each upload is applied once; reruns and option changes show the stored outcome
+            if st.session_state.get('last_import_key') != uploaded_file.file_id:
+                st.session_state['last_import_key'] = uploaded_file.file_id
+                st.session_state['last_import'] = _import_file(uploaded_file, import_mode, include_conflicts)
+            _show_import_result(st.session_state['last_import'])
 
-            if success:
-                # Convert Quantity and Price columns to numeric
-                result['Quantity'] = pd.to_numeric(result['Quantity'], errors='coerce')
-                result['Price'] = pd.to_numeric(result['Price'], errors='coerce')
-                
-                # Convert Date to correct format
-                result['Date'] = pd.to_datetime(result['Date'], errors='coerce', format='%Y-%m-%d')
-                
-                # Check for NaT values in Date column
-                if result['Date'].isnull().any():
-                    st.warning("Some dates were invalid and have been set to NaT. Please review your data.")
-                
-                # Check for NaN values after conversion
-                if result['Quantity'].isnull().any() or result['Price'].isnull().any():
-                    st.error("Quantity and Price must be numeric values.")
-                else:
-                    st.session_state.transactions_df = result
-                    st.success("CSV file uploaded successfully!")
+def _import_file(uploaded_file, import_mode, include_conflicts):
+    """Validate an uploaded ledger and apply it; returns the messages and rows to show"""
+    # Columns come back typed, so no further date/numeric conversion is needed
+    success, result = validate_ledger_file(uploaded_file)
+    if not success:
+        return {'error': result}
+    
+    messages = []
+    # Check for NaT values in Date column
+    if result['Date'].isnull().any():
+        messages.append(('warning', "Some dates were invalid and have been set to NaT. Please review your data."))
+    
+    # Validate every distinct symbol in one pass
+    _, invalid_symbols = validate_symbols(result['Symbol'].unique())
+    if invalid_symbols:
+        messages.append(('warning',
+            f"{len(invalid_symbols)} symbol(s) could not be validated: "
+            + ", ".join(sorted(invalid_symbols))
+        ))
+    
+    if import_mode == "Replace ledger":
+        replace_transactions(result)
+        messages.append(('success', "File uploaded successfully!"))
+        return {'messages': messages, 'rows': result}
+    
+    success, report = merge_transactions(result, include_conflicts)
+    if not success:
+        return {'error': report}
+    
+    added = report['added']
+    messages.append(('success',
+        f"Added {len(added)} new row(s); {report['duplicates']} row(s) were already in the ledger."
+    ))
+    if len(added):
+        messages.append(('info', "Affected symbols: " + ", ".join(sorted(added['Symbol'].unique()))))
+    conflicts = report['conflicts']
+    if len(conflicts):
+        action = "imported" if include_conflicts else "skipped"
+        messages.append(('warning',
+            f"{len(conflicts)} row(s) conflict with existing trades (same symbol, date and type) and were {action}:"
+        ))
+    return {'messages': messages, 'rows': added, 'conflicts': conflicts}
 
-                st.write(result)
-            else:
-                st.error(result) 
+def _show_import_result(outcome):
+    if 'error' in outcome:
+        st.error(outcome['error'])
+        return
+    
+    for level, message in outcome['messages']:
+        getattr(st, level)(message)
+    if len(outcome.get('conflicts', [])):
+        st.dataframe(outcome['conflicts'], hide_index=True)
+    st.write(outcome['rows'])
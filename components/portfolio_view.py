@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
-from utils.data_manager import get_transactions, delete_transaction
+from utils.data_manager import get_transactions, delete_transaction, get_portfolio_timeline
 from utils.stock_api import get_current_price
 from utils.calculations import calculate_portfolio_value
-import plotly.express as px
+from utils.price_stream import (
+    SimulatedTickSource,
+    PollingTickSource,
+    build_live_book,
+    apply_ticks,
+    book_allocation
+)
+from utils.timeline import allocation_weights, allocation_drift
+from utils.price_store import open_price_store
+from components.data_export import show_export_buttons
+
+ALLOCATION_FREQUENCIES = {'Daily': None, 'Weekly': 'W', 'Monthly': 'ME'}
+ALLOCATION_TOP_SYMBOLS = 15  # Symbols drawn individually; the rest are grouped as Other
 
 def show_portfolio_view():
     st.header("Portfolio Overview")
@@ -29,30 +41,33 @@ def show_portfolio_view():
     portfolio_df = calculate_portfolio_value(transactions_df)
     
     if not portfolio_df.empty:
-        # Portfolio Allocation Chart
-        fig = px.pie(
-            portfolio_df,
-            values='Current Value',
-            names='Symbol',
-            title='Portfolio Allocation'
-        )
-        st.plotly_chart(fig)
-        
-        st.subheader("Current Holdings")
-        st.dataframe(portfolio_df.style.format({
-            'Current Price': '{:.2f}',
-            'Current Value': '{:.2f}'
-        }))
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            live_mode = st.toggle("Live prices", value=False)
+        with col2:
+            source_name = st.selectbox("Price source", ["Simulated", "Yahoo Finance"], disabled=not live_mode)
+        with col3:
+            refresh_seconds = st.slider("Refresh every (seconds)", min_value=1, max_value=60, value=5, disabled=not live_mode)
         
         total_value = portfolio_df['Current Value'].sum()
         
-        # Save total value in session state
+        # Save total value at real prices in session state, live or not
         st.session_state['total_portfolio_value'] = total_value
         
-        st.metric("Total Portfolio Value", f"{total_value:,.2f}")
+        if live_mode:
+            _prepare_live_book(portfolio_df, source_name)
+            st.fragment(run_every=refresh_seconds)(_show_live_holdings)()
+        else:
+            _show_holdings(portfolio_df)
+            st.metric("Total Portfolio Value", f"{total_value:,.2f}")
+        
+        show_export_buttons(portfolio_df, "holdings", "holdings", "Export holdings")
+        
+        _show_allocation_history()
     
     # Display all transactions
     st.subheader("Transaction History")
+    show_export_buttons(transactions_df, "transactions", "ledger", "Export transactions")
     if not transactions_df.empty:
         for idx, row in transactions_df.iterrows():
             with st.expander(
@@ -70,4 +85,113 @@ def show_portfolio_view():
                             st.success(msg)
                             st.rerun()
                         else:
-                            st.error(msg) 
\ No newline at end of file
+                            st.error(msg)
+
+def _show_holdings(portfolio_df):
+    import plotly.express as px
+
+    # Portfolio Allocation Chart
+    fig = px.pie(
+        portfolio_df,
+        values='Current Value',
+        names='Symbol',
+        title='Portfolio Allocation'
+    )
+    st.plotly_chart(fig)
+    
+    st.subheader("Current Holdings")
+    formats = {
+        'Current Price': '{:.2f}',
+        'Current Value': '{:.2f}'
+    }
+    if 'Allocation' in portfolio_df.columns:
+        formats['Allocation'] = '{:.2f}%'
+    st.dataframe(portfolio_df.style.format(formats))
+
+def _show_allocation_history():
+    """Stacked-area allocation over time and weight drift statistics"""
+    import plotly.express as px
+
+    st.subheader("Allocation Over Time")
+    frequency = st.radio("Sample", list(ALLOCATION_FREQUENCIES), index=2, horizontal=True)
+    
+    current_prices = st.session_state.current_prices
+    weights = allocation_weights(
+        get_portfolio_timeline(current_prices),
+        current_prices,
+        open_price_store(),
+        ALLOCATION_FREQUENCIES[frequency]
+    )
+    if weights.empty:
+        st.info("No priced holdings to chart yet.")
+        return
+    
+    # Largest current positions drawn individually, the rest grouped
+    ranked = weights.iloc[-1].sort_values(ascending=False).index
+    chart = weights[ranked[:ALLOCATION_TOP_SYMBOLS]]
+    if len(ranked) > ALLOCATION_TOP_SYMBOLS:
+        chart = chart.assign(Other=weights[ranked[ALLOCATION_TOP_SYMBOLS:]].sum(axis=1))
+    
+    fig = px.area(
+        chart * 100,
+        title='Allocation Over Time',
+        labels={'value': 'Allocation (%)', 'index': 'Date', 'variable': 'Symbol'}
+    )
+    st.plotly_chart(fig)
+    
+    summary, turnover = allocation_drift(weights)
+    summary = (summary.loc[ranked] * 100).rename_axis('Symbol').reset_index()
+    st.dataframe(
+        summary.style.format({column: '{:.2f}%' for column in summary.columns if column != 'Symbol'}),
+        hide_index=True
+    )
+    if len(turnover):
+        st.caption(
+            f"Average turnover per period: {turnover.mean()*100:.2f}% "
+            f"(largest {turnover.max()*100:.2f}% on {turnover.idxmax():%Y-%m-%d})"
+        )
+
+def _prepare_live_book(portfolio_df, source_name):
+    """Create the live book and tick source, rebuilding them when holdings or source change"""
+    book_key = (
+        tuple(portfolio_df['Symbol']),
+        tuple(portfolio_df['Quantity']),
+        source_name
+    )
+    if st.session_state.get('live_book_key') == book_key:
+        return
+    
+    if source_name == "Simulated":
+        source = SimulatedTickSource(st.session_state.current_prices)
+    else:
+        source = PollingTickSource()
+    
+    st.session_state['live_book'] = build_live_book(portfolio_df)
+    st.session_state['live_source'] = source
+    st.session_state['live_book_key'] = book_key
+
+def _show_live_holdings():
+    """Drain pending ticks, revalue only the changed symbols and redraw holdings"""
+    book = st.session_state['live_book']
+    ticks = st.session_state['live_source'].poll(book['symbols'])
+    changed = apply_ticks(book, ticks)
+    
+    # Ticks stay in the live book; only real polled quotes update the prices
+    # used by the rest of the app, never simulated ones
+    if isinstance(st.session_state['live_source'], PollingTickSource):
+        for symbol in changed:
+            st.session_state.current_prices[symbol] = ticks[symbol]
+        st.session_state['total_portfolio_value'] = book['total']
+    
+    live_df = pd.DataFrame({
+        'Symbol': book['symbols'],
+        'Quantity': book['quantity'],
+        'Current Price': book['price'],
+        'Current Value': book['value'],
+        'Allocation': book_allocation(book) * 100
+    })
+    
+    _show_holdings(live_df)
+    
+    st.metric("Total Portfolio Value", f"{book['total']:,.2f}")
+    st.caption(f"{len(changed)} symbol(s) updated at {pd.Timestamp.now():%H:%M:%S}")
@@ -0,0 +1,52 @@
+"""
+Build the local symbol master used for offline symbol validation.
+
+Downloads the Nasdaq Trader symbol directory (Nasdaq-listed and other-listed
+US securities) and writes a Symbol,Name CSV to SYMBOL_MASTER_PATH
+(default data/symbols.csv). Run it periodically, e.g. from a daily cron job;
+the app picks up the new file without a restart.
+
+Usage:
+    python scripts/build_symbol_master.py [output.csv]
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.symbol_master import DEFAULT_MASTER_PATH
+
+SOURCES = [
+    ('https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt', 'Symbol'),
+    ('https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt', 'ACT Symbol'),
+]
+
+def fetch_listing(url, symbol_column):
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    listing = pd.read_csv(io.StringIO(response.text), sep='|', dtype=str, keep_default_na=False)
+    # The last row is a "File Creation Time" footer
+    listing = listing[~listing[symbol_column].str.startswith('File Creation Time')]
+    if 'Test Issue' in listing.columns:
+        listing = listing[listing['Test Issue'] != 'Y']
+    return pd.DataFrame({
+        'Symbol': listing[symbol_column].str.strip().str.upper(),
+        'Name': listing['Security Name'].str.strip()
+    })
+
+def main(argv):
+    output = argv[0] if argv else DEFAULT_MASTER_PATH
+    master = pd.concat([fetch_listing(url, column) for url, column in SOURCES], ignore_index=True)
+    master = master[master['Symbol'] != ''].drop_duplicates('Symbol').sort_values('Symbol')
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    staging = f"{output}.tmp"
+    master.to_csv(staging, index=False)
+    os.replace(staging, output)
+    print(f"Wrote {len(master)} symbols to {output}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+Measure application start-up import cost.
+
+Runs each target module in a fresh interpreter with ``python -X importtime`` and
+prints the wall-clock import time plus the most expensive top-level packages.
+
+Usage:
+    python scripts/import_profile.py [module ...] [--top N]
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_MODULES = [
+    'app',
+    'components.portfolio_input',
+    'components.portfolio_view',
+    'components.portfolio_analysis',
+]
+
+# Dependencies that should only load when a feature needs them
+HEAVY_MODULES = [
+    'yfinance',
+    'scipy.optimize',
+    'numpy_financial',
+    'plotly.express',
+    'plotly.graph_objects',
+]
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def profile_module(module, repo_root):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (wall seconds, {top-level package: self microseconds},
+        {module: cumulative microseconds})
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    by_package = defaultdict(int)
+    loaded = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        loaded[name] = int(cumulative_us)
+        by_package[name.split('.')[0]] += int(self_us)
+    return elapsed, by_package, loaded
+
+def main(argv):
+    top = 10
+    if '--top' in argv:
+        index = argv.index('--top')
+        top = int(argv[index + 1])
+        argv = argv[:index] + argv[index + 2:]
+    modules = argv or DEFAULT_MODULES
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    for module in modules:
+        elapsed, by_package, loaded = profile_module(module, repo_root)
+        total_ms = sum(by_package.values()) / 1000
+        print(f"\n{module}: {elapsed:.2f}s wall, {total_ms:.0f} ms importing")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {package:<28} {self_us / 1000:8.1f} ms")
+
+        # Streamlit itself pulls in lightweight lazy stubs of some of these
+        eager = [f"{name} ({loaded[name] / 1000:.1f} ms)" for name in HEAVY_MODULES if name in loaded]
+        print(f"  heavy modules loaded at import: {', '.join(eager) if eager else 'none'}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
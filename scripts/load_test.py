@@ -0,0 +1,170 @@
+"""
+Load-test the local analytics API.
+
+Writes synthetic ledgers to a temporary directory, starts api_server in a child
+process with a stand-in quote provider (fixed per-symbol prices behind a
+simulated network latency), then runs concurrent keep-alive clients against a
+mix of endpoints and reports latency percentiles and cache statistics.
+
+Usage:
+    python scripts/load_test.py [--ledgers 4] [--rows 5000] [--symbols 50]
+                                [--clients 32] [--requests 2000] [--latency 0.05]
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ['holdings', 'xirr', 'mirr', 'twr', 'holding-time', 'symbols']
+
+def stand_in_price(symbol, latency):
+    """Deterministic quote for a symbol after a simulated provider round trip"""
+    time.sleep(latency)
+    return True, 10 + zlib.crc32(symbol.encode()) % 490
+
+def write_ledgers(directory, count, rows, symbols, seed=0):
+    """Write synthetic Parquet ledgers and return their names"""
+    rng = np.random.default_rng(seed)
+    universe = [f"SYM{i:04d}" for i in range(symbols)]
+    names = []
+    for i in range(count):
+        ledger = pd.DataFrame({
+            'Symbol': rng.choice(universe, rows),
+            'Date': pd.Timestamp('2010-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 5000, rows)), unit='D'),
+            'Type': rng.choice(['BUY', 'BUY', 'SELL'], rows),
+            'Quantity': rng.integers(1, 50, rows).astype(float),
+            'Price': rng.uniform(10, 500, rows)
+        })
+        names.append(f"ledger{i}")
+        ledger.to_parquet(os.path.join(directory, f"{names[-1]}.parquet"), index=False)
+    return names
+
+def run_server(ledger_dir, port, latency, workers, ready):
+    from functools import partial
+    from api_server import serve
+    from utils.api_service import AnalyticsService
+
+    service = AnalyticsService(ledger_dir, fetch_price=partial(stand_in_price, latency=latency), workers=workers)
+    try:
+        asyncio.run(serve(service, port=port, ready=ready.set))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+async def request(reader, writer, path):
+    """Send one keep-alive GET and return (status, body)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':')[1]) for line in lines if line.lower().startswith('content-length'))
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(port, paths, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for endpoint, path in paths:
+            start = time.perf_counter()
+            status, body = await request(reader, writer, path)
+            latencies[endpoint].append(time.perf_counter() - start)
+            if status != 200:
+                errors.append((path, body.get('error')))
+    finally:
+        writer.close()
+
+async def run_clients(port, names, clients, requests, seed=0):
+    rng = random.Random(seed)
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = []
+    plans = [[] for _ in range(clients)]
+    for i in range(requests):
+        endpoint = rng.choice(ENDPOINTS)
+        path = f"/ledgers/{rng.choice(names)}/{endpoint}"
+        if endpoint == 'mirr':
+            path += f"?finance_rate={rng.choice([0.05, 0.1])}&reinvest_rate={rng.choice([0.05, 0.1])}"
+        plans[i % clients].append((endpoint, path))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, plan, latencies, errors) for plan in plans))
+    elapsed = time.perf_counter() - start
+
+    _, stats = await fetch_once(port, '/stats')
+    return latencies, errors, elapsed, stats
+
+async def fetch_once(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return await request(reader, writer, path)
+    finally:
+        writer.close()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ledgers', type=int, default=4, help='Number of synthetic ledgers')
+    parser.add_argument('--rows', type=int, default=5000, help='Transactions per ledger')
+    parser.add_argument('--symbols', type=int, default=50, help='Symbol universe size')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=2000, help='Total requests')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stand-in provider latency in seconds')
+    parser.add_argument('--workers', type=int, default=None, help='Server worker processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as ledger_dir:
+        names = write_ledgers(ledger_dir, args.ledgers, args.rows, args.symbols)
+        port = free_port()
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(
+            target=run_server, args=(ledger_dir, port, args.latency, args.workers, ready)
+        )
+        server.start()
+        try:
+            if not ready.wait(60):
+                sys.exit("Server did not start")
+
+            # The first request per ledger pays for quote fetches and pool start-up
+            cold_start = time.perf_counter()
+            asyncio.run(fetch_once(port, f"/ledgers/{names[0]}/xirr"))
+            print(f"Cold request: {time.perf_counter() - cold_start:.2f} s")
+
+            latencies, errors, elapsed, stats = asyncio.run(
+                run_clients(port, names, args.clients, args.requests)
+            )
+        finally:
+            # SIGINT lets the server shut its worker pool down cleanly
+            os.kill(server.pid, signal.SIGINT)
+            server.join(30)
+            if server.is_alive():
+                server.terminate()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests from {args.clients} clients in {elapsed:.2f} s ({total / elapsed:.0f} req/s)")
+    print(f"{'Endpoint':<14}{'Count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, samples in latencies.items():
+        if samples:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            print(f"{endpoint:<14}{len(samples):>7}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    print("Server stats:", json.dumps(stats))
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[0]}")
+
+if __name__ == '__main__':
+    main()
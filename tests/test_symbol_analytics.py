@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from utils.calculations import calculate_weighted_holding_time
+from utils.symbol_analytics import calculate_symbol_metrics
+
+PRICES = {'A': 15.0, 'B': 25.0}
+
+def test_rows_without_a_date_match_the_dataframe_holding_time():
+    ledger = pd.DataFrame({
+        'Symbol': ['A', 'A', 'B'],
+        'Date': pd.to_datetime(['2020-01-01', None, '2021-01-01']),
+        'Type': ['BUY', 'BUY', 'BUY'],
+        'Quantity': [10.0, 5.0, 3.0],
+        'Price': [10.0, 12.0, 20.0]
+    })
+    metrics = {m['Symbol']: m for m in calculate_symbol_metrics(ledger, PRICES, workers=1)}
+
+    expected = calculate_weighted_holding_time(ledger, 'A', PRICES)
+    assert np.isclose(metrics['A']['Avg Holding Time'], expected)
+    assert metrics['A']['Avg Holding Time'] > 0
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from utils.xirr_solver import calculate_xirr_incremental
+
+PRICES = {'A': 15.0, 'B': 25.0}
+
+def _ledger():
+    return pd.DataFrame({
+        'Symbol': ['A', 'A', 'B'],
+        'Date': pd.to_datetime(['2020-01-01', None, '2021-01-01']),
+        'Type': ['BUY', 'BUY', 'BUY'],
+        'Quantity': [10.0, 5.0, 3.0],
+        'Price': [10.0, 12.0, 20.0]
+    })
+
+def test_rows_without_a_date_are_ignored():
+    ledger = _ledger()
+    dated = ledger.dropna(subset=['Date']).reset_index(drop=True)
+
+    rate = calculate_xirr_incremental(ledger, {}, PRICES)
+    expected = calculate_xirr_incremental(dated, {}, PRICES)
+    assert rate is not None
+    assert np.isclose(rate, expected)
+
+def test_appended_rows_without_a_date_are_ignored():
+    ledger = _ledger()
+    cache = {}
+    calculate_xirr_incremental(ledger.iloc[:1], cache, PRICES)
+    rate = calculate_xirr_incremental(ledger, cache, PRICES)
+    assert np.isclose(rate, calculate_xirr_incremental(ledger, {}, PRICES))
+    assert cache[('default', None)]['dates'].min() >= pd.Timestamp('2020-01-01').value
+
+def test_symbol_without_dated_rows():
+    ledger = _ledger().iloc[[1]]
+    assert calculate_xirr_incremental(ledger, {}, PRICES, symbol='A') is None
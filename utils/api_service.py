@@ -0,0 +1,246 @@
+import os
+import re
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from utils.calculations import calculate_portfolio_value, calculate_mirr_surface, calculate_weighted_holding_time
+from utils.data_manager import validate_ledger_file
+from utils.price_store import open_price_store
+from utils.stock_api import PriceCache, price_cache, get_current_price, QUOTE_TTL_SECONDS
+from utils.symbol_analytics import calculate_symbol_metrics, default_worker_count
+from utils.timeline import build_timeline, timeline_twr
+from utils.xirr_solver import calculate_xirr_incremental
+
+DEFAULT_LEDGER_DIR = os.environ.get('LEDGER_DIR', os.path.join('data', 'ledgers'))
+LEDGER_EXTENSIONS = ('.csv', '.parquet', '.arrow', '.feather', '.ipc')
+LEDGER_NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]*')
+
+RESULT_CACHE_SIZE = 1024    # Computed results kept, least recently used evicted first
+QUOTE_WORKERS = 16          # Concurrent quote fetches
+
+METRICS = ('holdings', 'xirr', 'mirr', 'twr', 'holding-time', 'symbols')
+
+def compute_metric(metric, transactions_df, current_prices, params):
+    """
+    Compute one metric for a ledger; runs in a worker process.
+
+    Args:
+        metric: One of METRICS
+        transactions_df: DataFrame containing transactions
+        current_prices: Dictionary of {symbol: price}
+        params: Dictionary of metric parameters ('symbol', 'finance_rate', 'reinvest_rate')
+
+    Returns:
+        JSON-serializable result
+    """
+    symbol = params.get('symbol')
+
+    if metric == 'holdings':
+        holdings = calculate_portfolio_value(transactions_df, current_prices)
+        return holdings.replace({np.nan: None}).to_dict(orient='records')
+
+    if metric == 'xirr':
+        return calculate_xirr_incremental(transactions_df, {}, current_prices, symbol=symbol)
+
+    if metric == 'mirr':
+        surface = calculate_mirr_surface(
+            transactions_df,
+            [params.get('finance_rate', 0.10)],
+            [params.get('reinvest_rate', 0.10)],
+            symbol=symbol,
+            current_prices=current_prices
+        )
+        return None if np.isnan(surface[0, 0]) else float(surface[0, 0])
+
+    if metric == 'twr':
+        if symbol:
+            transactions_df = transactions_df[transactions_df['Symbol'] == symbol]
+        timeline = build_timeline(transactions_df, current_prices, price_store=open_price_store())
+        return timeline_twr(timeline)
+
+    if metric == 'holding-time':
+        return calculate_weighted_holding_time(transactions_df, symbol, current_prices)
+
+    if metric == 'symbols':
+        return calculate_symbol_metrics(transactions_df, current_prices, workers=1)
+
+    raise ValueError(f"Unknown metric: {metric}")
+
+class AnalyticsService:
+    """
+    Ledger analytics shared by every request of an API server process.
+
+    Quotes (through the shared cache in utils.stock_api) and computed results
+    are cached process-wide, concurrent requests for the same quote or result
+    share one computation, and metric solves run on a process pool so the event
+    loop stays free for cheap requests.
+    """
+
+    def __init__(self, ledger_dir=None, fetch_price=None, workers=None,
+                 price_ttl=QUOTE_TTL_SECONDS):
+        """
+        Args:
+            ledger_dir: Directory of stored ledgers, one file per ledger
+            fetch_price: Quote provider returning (success, price) for a symbol
+                (default: the market provider, sharing the process-wide quote cache)
+            workers: Worker processes for metric solves (default from default_worker_count)
+            price_ttl: Seconds a quote from a custom provider is reused
+        """
+        self.ledger_dir = ledger_dir or DEFAULT_LEDGER_DIR
+        if fetch_price is None:
+            self.quote_cache = price_cache
+            self.fetch_price = get_current_price
+        else:
+            # A custom provider gets its own cache so it cannot mix with market quotes
+            self.quote_cache = PriceCache()
+            self.fetch_price = lambda symbol: self.quote_cache.get_or_fetch(
+                ('quote', symbol), lambda: fetch_price(symbol), price_ttl
+            )
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers or default_worker_count(),
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+        self.quote_pool = ThreadPoolExecutor(max_workers=QUOTE_WORKERS)
+
+        self.ledgers = {}            # {name: (version, DataFrame)}
+        self.results = OrderedDict() # {key: result}
+        self.inflight = {}           # {key: Future} for quotes, ledgers and results
+        self.stats = {
+            'requests': 0,
+            'result_hits': 0,
+            'result_misses': 0
+        }
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.quote_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _coalesce(self, key, factory):
+        """Await the in-flight computation for key, starting it with factory if there is none"""
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def list_ledgers(self):
+        """Names of the stored ledgers"""
+        if not os.path.isdir(self.ledger_dir):
+            return []
+        return sorted(
+            os.path.splitext(entry)[0] for entry in os.listdir(self.ledger_dir)
+            if entry.lower().endswith(LEDGER_EXTENSIONS)
+        )
+
+    def _ledger_path(self, name):
+        if not LEDGER_NAME.fullmatch(name):
+            return None
+        for extension in LEDGER_EXTENSIONS:
+            path = os.path.join(self.ledger_dir, name + extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    async def get_ledger(self, name):
+        """
+        Load a stored ledger, reusing the parsed copy until its file changes.
+
+        Returns:
+            tuple: (success, (version, DataFrame) or error message)
+        """
+        path = self._ledger_path(name)
+        if path is None:
+            return False, f"Ledger not found: {name}"
+
+        version = os.stat(path).st_mtime_ns
+        cached = self.ledgers.get(name)
+        if cached is not None and cached[0] == version:
+            return True, cached
+
+        def load():
+            with open(path, 'rb') as f:
+                return validate_ledger_file(f)
+
+        async def read():
+            success, result = await asyncio.to_thread(load)
+            if success:
+                self.ledgers[name] = (version, result)
+                return True, self.ledgers[name]
+            return False, result
+
+        return await self._coalesce(('ledger', name, version), read)
+
+    async def get_prices(self, symbols):
+        """
+        Current quotes for symbols, fetching only missing or expired ones.
+
+        Returns:
+            dict: {symbol: price} for symbols the provider could price
+        """
+        loop = asyncio.get_running_loop()
+        prices = {}
+        pending = {}
+
+        for symbol in symbols:
+            # Cached quotes are read on the event loop; only misses go to a thread
+            quote = self.quote_cache.peek(('quote', symbol))
+            if quote is not None:
+                if quote[0]:
+                    prices[symbol] = quote[1]
+                continue
+
+            async def fetch(symbol=symbol):
+                return await loop.run_in_executor(self.quote_pool, self.fetch_price, symbol)
+
+            pending[symbol] = self._coalesce(('quote', symbol), fetch)
+
+        fetched = await asyncio.gather(*pending.values())
+        prices.update((symbol, price) for symbol, (success, price) in zip(pending, fetched) if success)
+        return prices
+
+    async def compute(self, name, metric, params):
+        """
+        Compute a metric for a stored ledger, serving repeated requests from the result cache.
+
+        Results are keyed by ledger version and the quotes used, so they stay
+        valid until the ledger file is rewritten or a held symbol's quote changes.
+
+        Returns:
+            tuple: (success, result or error message)
+        """
+        self.stats['requests'] += 1
+        if metric not in METRICS:
+            return False, f"Unknown metric: {metric}"
+
+        success, ledger = await self.get_ledger(name)
+        if not success:
+            return False, ledger
+        version, transactions_df = ledger
+
+        symbols = transactions_df['Symbol'].unique()
+        prices = await self.get_prices(symbols)
+        key = (name, version, metric, tuple(sorted(params.items())), tuple(sorted(prices.items())))
+
+        if key in self.results:
+            self.stats['result_hits'] += 1
+            self.results.move_to_end(key)
+            return True, self.results[key]
+        self.stats['result_misses'] += 1
+
+        async def solve():
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.pool, compute_metric, metric, transactions_df, prices, params
+            )
+            self.results[key] = result
+            while len(self.results) > RESULT_CACHE_SIZE:
+                self.results.popitem(last=False)
+            return result
+
+        try:
+            return True, await self._coalesce(('result',) + key, solve)
+        except Exception as e:
+            return False, f"Error calculating {metric}: {str(e)}"
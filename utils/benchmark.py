@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from utils.xirr_solver import solve_xirr
+
+def _ledger_contributions(transactions_df):
+    """Money put in by each ledger row (buys positive, sells negative) and its date, in date order"""
+    quantity = transactions_df['Quantity'].to_numpy(dtype=float)
+    price = transactions_df['Price'].to_numpy(dtype=float)
+    is_buy = (transactions_df['Type'] == 'BUY').to_numpy()
+    dates = pd.to_datetime(transactions_df['Date']).dt.normalize().to_numpy('datetime64[ns]')
+
+    valid = ~np.isnat(dates)
+    amounts = np.where(is_buy, quantity * price, -quantity * price)[valid]
+    dates = dates[valid]
+    order = np.argsort(dates, kind='stable')
+    return amounts[order], dates[order]
+
+def compare_to_benchmarks(transactions_df, benchmark_prices, value_dates, portfolio_value=None):
+    """
+    Public-market-equivalent comparison against one or more benchmarks.
+
+    Every buy is treated as buying benchmark units at that day's close and every
+    sell as selling units of the same value. All flows and value dates are
+    aligned to the benchmark calendar with one searchsorted, and the unit,
+    value and growth arrays are computed for all benchmarks at once.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        benchmark_prices: DataFrame of closes indexed by date, one column per benchmark
+        value_dates: Dates of the benchmark-equivalent value series
+        portfolio_value: Optional current portfolio value, for the Kaplan-Schoar PME
+
+    Returns:
+        dict: 'values' DataFrame (value_dates x benchmarks) of benchmark-equivalent
+        value, and per-benchmark dictionaries 'xirr' and 'ks_pme' (None where
+        undefined; a KS-PME above 1 means the portfolio beat the benchmark)
+    """
+    benchmarks = list(benchmark_prices.columns)
+    value_dates = pd.DatetimeIndex(value_dates)
+    amounts, flow_dates = _ledger_contributions(transactions_df)
+    if len(amounts) == 0 or len(value_dates) == 0 or benchmark_prices.empty:
+        return {
+            'values': pd.DataFrame(0.0, index=value_dates, columns=benchmarks),
+            'xirr': dict.fromkeys(benchmarks),
+            'ks_pme': dict.fromkeys(benchmarks)
+        }
+
+    # Flows before a benchmark's history starts are priced at its first close
+    closes = benchmark_prices.sort_index().ffill().bfill()
+    calendar = closes.index.values.astype('datetime64[ns]')
+    prices = closes.to_numpy(dtype=float)
+
+    rows = np.searchsorted(calendar, np.concatenate([flow_dates, value_dates.values]), side='right') - 1
+    rows = np.maximum(rows, 0)
+    flow_rows, value_rows = rows[:len(flow_dates)], rows[len(flow_dates):]
+
+    flow_prices = prices[flow_rows]                    # (flows x benchmarks)
+    units = amounts[:, None] / flow_prices
+    cumulative_units = np.cumsum(units, axis=0)
+
+    # Units held at each value date: all flows on or before it
+    flows_before = np.searchsorted(flow_dates, value_dates.values, side='right') - 1
+    held = np.where(
+        (flows_before >= 0)[:, None],
+        cumulative_units[np.maximum(flows_before, 0)],
+        0.0
+    )
+    values = pd.DataFrame(held * prices[value_rows], index=value_dates, columns=benchmarks)
+
+    # Benchmark XIRR: the ledger's flows plus the terminal value of the units held
+    end_price = prices[value_rows[-1]]
+    terminal = cumulative_units[-1] * end_price
+    years = (np.append(flow_dates, value_dates.values[-1]) - flow_dates[0]) / np.timedelta64(365, 'D')
+    xirr = {
+        benchmark: solve_xirr(np.append(-amounts, terminal[j]), years)
+        for j, benchmark in enumerate(benchmarks)
+    }
+
+    # Kaplan-Schoar PME: flows compounded at the benchmark's growth to the end date
+    ks_pme = dict.fromkeys(benchmarks)
+    if portfolio_value is not None:
+        growth = end_price / flow_prices
+        contributed = np.where(amounts > 0, amounts, 0.0) @ growth
+        distributed = np.where(amounts < 0, -amounts, 0.0) @ growth
+        for j, benchmark in enumerate(benchmarks):
+            if contributed[j] > 0:
+                ks_pme[benchmark] = float((distributed[j] + portfolio_value) / contributed[j])
+
+    return {
+        'values': values,
+        'xirr': xirr,
+        'ks_pme': ks_pme
+    }
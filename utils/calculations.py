@@ -1,9 +1,8 @@
 import pandas as pd
-import numpy_financial as npf
 from datetime import datetime
 import streamlit as st
-from scipy.optimize import newton
 import numpy as np
+from utils.xirr_solver import solve_xirr
 
 def calculate_portfolio_value(transactions_df, current_prices=None):
     """Calculate current portfolio value and holdings"""
@@ -14,13 +13,11 @@ def calculate_portfolio_value(transactions_df, current_prices=None):
     if current_prices is None:
         current_prices = st.session_state.get('current_prices', {})
     
-    holdings = transactions_df.copy()
-    holdings['Quantity'] = holdings.apply(
-        lambda x: x['Quantity'] if x['Type'] == 'BUY' else -x['Quantity'], 
-        axis=1
+    signed_quantity = transactions_df['Quantity'].where(
+        transactions_df['Type'] == 'BUY', -transactions_df['Quantity']
     )
     
-    portfolio = holdings.groupby('Symbol')['Quantity'].sum().reset_index()
+    portfolio = signed_quantity.groupby(transactions_df['Symbol']).sum().reset_index()
     portfolio = portfolio[portfolio['Quantity'] > 0]  # Only show current holdings
     
     portfolio['Current Price'] = portfolio['Symbol'].map(current_prices)
@@ -30,30 +27,27 @@ def calculate_portfolio_value(transactions_df, current_prices=None):
 
 def xirr(amounts, dates, initial_guess=0.1):
     """Calculate XIRR given cash flows and dates"""
+    from scipy.optimize import newton
+
     if len(amounts) < 2:  # Need at least 2 cash flows
         return None
         
-    def xnpv(rate, amounts, dates):
+    # Years since the first cash flow, computed once for every solver iteration
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+    years = (dates - dates[0]) / np.timedelta64(365, 'D')
+    amounts = np.asarray(amounts, dtype=float)
+    
+    def xnpv(rate, amounts, years):
         """Calculate XNPV (Net Present Value with dates)"""
         if isinstance(rate, np.ndarray):
             rate = rate[0]
         if rate <= -1:
             return float('inf')
-        
-        # Convert dates to python datetime
-        dates = [pd.Timestamp(d).to_pydatetime() for d in dates]
-        
-        values = []
-        for amount, date in zip(amounts, dates):
-            days = (date - dates[0]).total_seconds() / (24 * 60 * 60 * 365.0)
-            value = amount / (1 + rate) ** days
-            values.append(value)
-            
-        return sum(values)
+        return np.sum(amounts / (1 + rate) ** years)
     
     try:
         result = newton(
-            lambda r: xnpv(r, amounts, dates),
+            lambda r: xnpv(r, amounts, years),
             x0=initial_guess,  # Use the provided initial guess
             tol=0.00001,
             maxiter=1000
@@ -75,11 +69,8 @@ def calculate_xirr(transactions_df, symbol=None, initial_guess=0.1):
     # Standardize date format to YYYY-mm-dd
     cash_flows['Date'] = pd.to_datetime(cash_flows['Date']).dt.normalize()
     
-    cash_flows['Amount'] = cash_flows.apply(
-        lambda x: -x['Quantity'] * x['Price'] if x['Type'] == 'BUY' 
-        else x['Quantity'] * x['Price'],
-        axis=1
-    )
+    trade_value = cash_flows['Quantity'] * cash_flows['Price']
+    cash_flows['Amount'] = trade_value.where(cash_flows['Type'] != 'BUY', -trade_value)
     
     current_holdings = calculate_portfolio_value(transactions_df)
 
@@ -122,15 +113,123 @@ def calculate_xirr_with_multiple_guesses(transactions_df, symbol=None):
     Raises:
         ValueError: If all attempts fail
     """
-    initial_guesses = [0.1, 0.0, 0.2, -0.1, 0.5]  # Multiple starting points
+    if transactions_df is None or transactions_df.empty:
+        return None
     
-    for guess in initial_guesses:
-        try:
-            return calculate_xirr(transactions_df, symbol, initial_guess=guess)
-        except Exception:
-            continue
+    if symbol:
+        transactions_df = transactions_df[transactions_df['Symbol'] == symbol]
+    
+    # Prepare the cash flows once; solve_xirr retries from multiple starting
+    # points and finally brackets the root
+    cash_flows = _ledger_cash_flows(transactions_df)
+    if cash_flows.empty:
+        return None
+    dates = cash_flows['Date'].to_numpy(dtype='datetime64[ns]')
+    years = (dates - dates[0]) / np.timedelta64(365, 'D')
     
-    raise ValueError("XIRR calculation failed with all initial guesses") 
+    result = solve_xirr(cash_flows['Amount'].to_numpy(dtype=float), years)
+    if result is None:
+        raise ValueError("XIRR calculation failed with all initial guesses")
+    return result 
+
+def _ledger_cash_flows(transactions_df, current_prices=None):
+    """
+    Build the signed cash-flow table used by the rate-of-return calculations.
+
+    Buys are negative flows and sells positive flows, in ledger order, followed
+    by one terminal flow per symbol still held, valued at the current price
+    and dated today.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        current_prices: Optional dictionary of {symbol: price}
+
+    Returns:
+        DataFrame with Symbol, Date and Amount columns
+    """
+    if current_prices is None:
+        current_prices = st.session_state.get('current_prices', {})
+
+    quantity = transactions_df['Quantity'].to_numpy(dtype=float)
+    price = transactions_df['Price'].to_numpy(dtype=float)
+    is_buy = (transactions_df['Type'] == 'BUY').to_numpy()
+
+    flows = pd.DataFrame({
+        'Symbol': transactions_df['Symbol'].to_numpy(),
+        'Date': pd.to_datetime(transactions_df['Date']).dt.normalize().to_numpy(),
+        'Amount': np.where(is_buy, -quantity * price, quantity * price)
+    })
+
+    holdings = calculate_portfolio_value(transactions_df, current_prices)
+    if not holdings.empty:
+        # Unpriced holdings contribute nothing, as when summing 'Current Value'
+        terminal = pd.DataFrame({
+            'Symbol': holdings['Symbol'].to_numpy(),
+            'Date': pd.Timestamp.now().normalize(),
+            'Amount': holdings['Current Value'].fillna(0.0).to_numpy(dtype=float)
+        })
+        flows = pd.concat([flows, terminal], ignore_index=True)
+
+    return flows
+
+def _mirr_surfaces(codes, amounts, dates, finance_rates, reinvest_rates):
+    """
+    Evaluate MIRR over a finance x reinvest rate grid for several groups of
+    cash flows in one broadcasted pass.
+
+    Each group is discounted from its own first flow and compounded to its own
+    last flow, matching the single-rate calculation.
+
+    Args:
+        codes: Integer group code per flow, flows of a group contiguous and in
+            ledger order
+        amounts: Cash flow amounts
+        dates: Cash flow dates (datetime64)
+        finance_rates: 1-D array of finance rates
+        reinvest_rates: 1-D array of reinvestment rates
+
+    Returns:
+        ndarray of shape (groups, len(finance_rates), len(reinvest_rates)),
+        NaN where MIRR is undefined
+    """
+    finance_rates = np.atleast_1d(np.asarray(finance_rates, dtype=float))
+    reinvest_rates = np.atleast_1d(np.asarray(reinvest_rates, dtype=float))
+    if len(codes) == 0:
+        return np.empty((0, len(finance_rates), len(reinvest_rates)))
+
+    _, starts = np.unique(codes, return_index=True)
+    ends = np.append(starts[1:], len(codes))
+    counts = ends - starts
+
+    # Years since each group's first flow, and each group's horizon
+    seconds = dates.astype('datetime64[s]').astype(np.int64).astype(float)
+    first = np.repeat(seconds[starts], counts)
+    years = (seconds - first) / (365.0 * 24 * 60 * 60)
+    horizon = years[ends - 1]
+
+    pos_flows = np.where(amounts > 0, amounts, 0.0)
+    neg_flows = np.where(amounts < 0, amounts, 0.0)
+
+    # Terminal value of positive flows: (reinvest rates, flows) reduced per group
+    to_horizon = np.repeat(horizon, counts) - years
+    growth = (1 + reinvest_rates)[:, None] ** to_horizon[None, :]
+    terminal_value = np.add.reduceat(growth * pos_flows, starts, axis=1)
+
+    # Present value of negative flows: (finance rates, flows) reduced per group
+    discount = (1 + finance_rates)[:, None] ** -years[None, :]
+    pv_neg_flows = np.add.reduceat(discount * neg_flows, starts, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = terminal_value.T[:, None, :] / np.abs(pv_neg_flows).T[:, :, None]
+        surfaces = ratio ** (1 / horizon)[:, None, None] - 1
+
+    valid = (
+        (np.add.reduceat(pos_flows, starts) > 0)
+        & (np.add.reduceat(neg_flows, starts) < 0)
+        & (horizon != 0)
+    )
+    surfaces[~valid] = np.nan
+    return surfaces
 
 def calculate_mirr(transactions_df, finance_rate=0.10, reinvest_rate=0.10):
     """
@@ -147,78 +246,84 @@ def calculate_mirr(transactions_df, finance_rate=0.10, reinvest_rate=0.10):
     if transactions_df is None or transactions_df.empty:
         return None
     
-    cash_flows = transactions_df.copy()
-    # Standardize date format to YYYY-mm-dd
-    cash_flows['Date'] = pd.to_datetime(cash_flows['Date']).dt.normalize()
-    
-    # Calculate cash flows
-    cash_flows['Amount'] = cash_flows.apply(
-        lambda x: -x['Quantity'] * x['Price'] if x['Type'] == 'BUY' 
-        else x['Quantity'] * x['Price'],
-        axis=1
-    )
-    
-    current_holdings = calculate_portfolio_value(transactions_df)
-
-    
-    if not current_holdings.empty:
-        current_value = current_holdings['Current Value'].sum()
-        last_flow = pd.DataFrame({
-            'Date': [pd.Timestamp.now().normalize()],  # Normalize to midnight
-            'Amount': [current_value]
-        })
-        cash_flows = pd.concat([
-            cash_flows[['Date', 'Amount']], 
-            last_flow
-        ], ignore_index=True)
-    
-    amounts = cash_flows['Amount'].values
-    dates = cash_flows['Date'].values
-    
     try:
-        # Check if we have both positive and negative cash flows
-        has_positive = any(a > 0 for a in amounts)
-        has_negative = any(a < 0 for a in amounts)
-        
-        if not (has_positive and has_negative):
-            return None
-            
-        # Convert dates to python datetime objects
-        dates = [pd.Timestamp(d).to_pydatetime() for d in dates]
-        
-        # Calculate years between dates
-        years = [(date - dates[0]).total_seconds() / (365.0 * 24 * 60 * 60) for date in dates]
-        
-        # Separate positive and negative cash flows
-        pos_flows = np.where(amounts > 0, amounts, 0)
-        neg_flows = np.where(amounts < 0, amounts, 0)
-        
-        if np.sum(pos_flows) == 0 or np.sum(neg_flows) == 0:
-            return None
-        
-        # Calculate terminal value of positive flows
-        terminal_value = sum(
-            flow * (1 + reinvest_rate) ** (years[-1] - year)
-            for flow, year in zip(pos_flows, years)
-        )
-        
-        # Calculate present value of negative flows
-        pv_neg_flows = sum(
-            flow / (1 + finance_rate) ** year
-            for flow, year in zip(neg_flows, years)
+        surface = calculate_mirr_surface(
+            transactions_df, [finance_rate], [reinvest_rate]
         )
-        
-        if pv_neg_flows == 0:
+        mirr = surface[0, 0]
+        if np.isnan(mirr):
             return None
-            
-        # Calculate MIRR
-        mirr = (terminal_value / abs(pv_neg_flows)) ** (1 / years[-1]) - 1
-        return mirr
+        return float(mirr)
         
     except Exception as e:
         st.error(f"MIRR calculation error: {str(e)}")
         return None 
 
+def calculate_mirr_surface(transactions_df, finance_rates, reinvest_rates,
+                           symbol=None, current_prices=None):
+    """
+    Calculate MIRR over a grid of finance and reinvestment rates
+    
+    Args:
+        transactions_df: DataFrame containing transactions
+        finance_rates: Sequence of rates for financing negative cash flows
+        reinvest_rates: Sequence of rates for reinvesting positive cash flows
+        symbol: Optional stock symbol to filter transactions
+        current_prices: Optional dictionary of {symbol: price}
+    
+    Returns:
+        ndarray: MIRR values indexed [finance_rate, reinvest_rate], NaN where
+        MIRR is undefined (everywhere if there are no cash flows)
+    """
+    if symbol:
+        transactions_df = transactions_df[transactions_df['Symbol'] == symbol]
+    
+    flows = _ledger_cash_flows(transactions_df, current_prices)
+    if flows.empty:
+        return np.full((len(finance_rates), len(reinvest_rates)), np.nan)
+    codes = np.zeros(len(flows), dtype=np.int64)
+    
+    return _mirr_surfaces(
+        codes,
+        flows['Amount'].to_numpy(dtype=float),
+        flows['Date'].to_numpy(),
+        finance_rates,
+        reinvest_rates
+    )[0]
+
+def calculate_mirr_surfaces_by_symbol(transactions_df, finance_rates, reinvest_rates,
+                                      current_prices=None):
+    """
+    Calculate MIRR rate-grid surfaces for every symbol in one pass
+    
+    Args:
+        transactions_df: DataFrame containing transactions
+        finance_rates: Sequence of rates for financing negative cash flows
+        reinvest_rates: Sequence of rates for reinvesting positive cash flows
+        current_prices: Optional dictionary of {symbol: price}
+    
+    Returns:
+        tuple: (symbols, surfaces) where surfaces has shape
+        (len(symbols), len(finance_rates), len(reinvest_rates))
+    """
+    if transactions_df is None or transactions_df.empty:
+        return [], np.empty((0, len(finance_rates), len(reinvest_rates)))
+    
+    flows = _ledger_cash_flows(transactions_df, current_prices)
+    
+    # Group flows by symbol, keeping ledger order within each symbol
+    symbols, codes = np.unique(flows['Symbol'].to_numpy(), return_inverse=True)
+    order = np.argsort(codes, kind='stable')
+    
+    surfaces = _mirr_surfaces(
+        codes[order],
+        flows['Amount'].to_numpy(dtype=float)[order],
+        flows['Date'].to_numpy()[order],
+        finance_rates,
+        reinvest_rates
+    )
+    return list(symbols), surfaces
+
 def calculate_twr(transactions_df, price_history=None):
     """
     Calculate Time-Weighted Return (TWR) for the portfolio
@@ -325,7 +430,7 @@ def calculate_twr(transactions_df, price_history=None):
     twr = np.prod([1 + r for r in holding_period_returns]) - 1
     return twr 
 
-def calculate_weighted_holding_time(transactions_df, symbol=None):
+def calculate_weighted_holding_time(transactions_df, symbol=None, current_prices=None):
     """
     Calculate weighted average holding time in days.
     Weighted Time = Σ(Cash Flow × Time Held) / Σ(Cash Flow)
@@ -333,6 +438,7 @@ def calculate_weighted_holding_time(transactions_df, symbol=None):
     Args:
         transactions_df: DataFrame containing transactions
         symbol: Optional stock symbol to filter transactions
+        current_prices: Optional dictionary of {symbol: price}
     
     Returns:
         float: Weighted average holding time in days
@@ -358,7 +464,7 @@ def calculate_weighted_holding_time(transactions_df, symbol=None):
     )
     
     # For current holdings, add a "virtual sell" at current date with current prices
-    current_holdings = calculate_portfolio_value(df)
+    current_holdings = calculate_portfolio_value(df, current_prices)
     current_date = pd.Timestamp.now()
     
     virtual_sells = []
@@ -2,6 +2,18 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 import io
+from utils.timeline import update_timeline
+from utils.price_store import open_price_store
+from utils.xirr_solver import invalidate_xirr_cache
+from utils.stock_api import get_price_matrix
+from utils.ledger_index import build_ledger_index, extend_ledger_index, append_keys, diff_import
+
+LEDGER_COLUMNS = ['Symbol', 'Date', 'Type', 'Quantity', 'Price']
+
+EXPORT_FORMATS = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file')
+}
 
 def validate_csv_file(file):
     try:
@@ -29,6 +41,90 @@ def validate_csv_file(file):
     except Exception as e:
         return False, f"Error processing CSV file: {str(e)}"
 
+def validate_ledger_file(file):
+    """
+    Load a transaction ledger from a CSV, Parquet or Arrow IPC (Feather) upload.
+
+    Parquet and Arrow files keep their column types, so date and numeric columns
+    that are already typed are used as-is instead of being parsed.
+
+    Returns:
+        tuple: (success, DataFrame or error message)
+    """
+    name = getattr(file, 'name', '').lower()
+    if name.endswith('.csv'):
+        return validate_csv_file(file)
+    
+    try:
+        if name.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            columns = pq.read_schema(file).names
+            reader = pd.read_parquet
+        elif name.endswith(('.arrow', '.feather', '.ipc')):
+            import pyarrow.ipc as ipc
+            columns = ipc.open_file(file).schema.names
+            reader = pd.read_feather
+        else:
+            return False, "Unsupported file type. Upload a CSV, Parquet or Arrow file."
+        
+        if not all(col in columns for col in LEDGER_COLUMNS):
+            return False, "File must contain columns: Symbol, Date, Type, Quantity, Price"
+        
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        df = reader(file, columns=LEDGER_COLUMNS)
+    except Exception as e:
+        return False, f"Error reading file: {str(e)}"
+    
+    try:
+        # Dictionary-encoded strings arrive as categoricals; use plain strings like the CSV path
+        for column in ['Symbol', 'Type']:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(str)
+        
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', errors='coerce')
+        elif df['Date'].dt.tz is not None:
+            df['Date'] = df['Date'].dt.tz_localize(None)
+        
+        if not df['Type'].isin(['BUY', 'SELL']).all():
+            return False, "Transaction Type must be either 'BUY' or 'SELL'"
+        
+        for column in ['Quantity', 'Price']:
+            if not pd.api.types.is_float_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+        
+        if df['Quantity'].isnull().any() or df['Price'].isnull().any():
+            return False, "Quantity and Price must be numeric values"
+        
+        return True, df
+    except Exception as e:
+        return False, f"Error processing file: {str(e)}"
+
+def export_dataframe(df, file_format):
+    """
+    Serialize a DataFrame to Parquet or Arrow IPC bytes, preserving column types.
+
+    Args:
+        df: DataFrame to export
+        file_format: 'parquet' or 'arrow'
+
+    Returns:
+        tuple: (success, bytes or error message)
+    """
+    try:
+        buffer = io.BytesIO()
+        df = df.reset_index(drop=True)
+        if file_format == 'parquet':
+            df.to_parquet(buffer, index=False)
+        elif file_format == 'arrow':
+            df.to_feather(buffer)
+        else:
+            return False, f"Unsupported export format: {file_format}"
+        return True, buffer.getvalue()
+    except Exception as e:
+        return False, f"Error exporting data: {str(e)}"
+
 def save_transaction(symbol, date, trans_type, quantity, price):
     try:
         new_transaction = pd.DataFrame({
@@ -39,6 +135,10 @@ def save_transaction(symbol, date, trans_type, quantity, price):
             'Price': [float(price)]
         })
         
+        index = st.session_state.get('ledger_index')
+        if index is not None:
+            st.session_state['ledger_index'] = extend_ledger_index(index, *append_keys(index, new_transaction))
+        
         if st.session_state.transactions_df is None:
             st.session_state.transactions_df = new_transaction
         else:
@@ -46,6 +146,7 @@ def save_transaction(symbol, date, trans_type, quantity, price):
                 [st.session_state.transactions_df, new_transaction],
                 ignore_index=True
             )
+        mark_ledger_changed(new_transaction['Date'].iloc[0])
         return True, "Transaction saved successfully!"
     except Exception as e:
         return False, f"Error saving transaction: {str(e)}"
@@ -55,8 +156,140 @@ def get_transactions():
 
 def delete_transaction(index):
     try:
+        mark_ledger_changed(st.session_state.transactions_df.loc[index, 'Date'])
+        # Cached XIRR arrays only support appends
+        invalidate_xirr_cache(get_xirr_solver_cache())
+        st.session_state['ledger_index'] = None
         st.session_state.transactions_df = st.session_state.transactions_df.drop(index)
         st.session_state.transactions_df = st.session_state.transactions_df.reset_index(drop=True)
         return True, "Transaction deleted successfully!"
     except Exception as e:
-        return False, f"Error deleting transaction: {str(e)}" 
\ No newline at end of file
+        return False, f"Error deleting transaction: {str(e)}"
+
+def replace_transactions(transactions_df):
+    """Replace the whole ledger with an imported one"""
+    st.session_state.transactions_df = transactions_df
+    st.session_state['ledger_index'] = None
+    mark_ledger_changed()
+
+def get_ledger_index():
+    """Row-hash index of the session ledger, rebuilt if it is missing or out of step"""
+    transactions_df = st.session_state.get('transactions_df')
+    if transactions_df is None:
+        return None
+    
+    index = st.session_state.get('ledger_index')
+    if index is None or index['rows'] != len(transactions_df):
+        index = build_ledger_index(transactions_df)
+        st.session_state['ledger_index'] = index
+    return index
+
+def merge_transactions(incoming_df, include_conflicts=False):
+    """
+    Append only the imported rows that are not already in the ledger, so
+    re-importing an overlapping file is idempotent.
+    
+    Rows are matched on their normalized content; identical trades are matched
+    by occurrence, so a file holding two identical trades adds both once. New
+    rows whose Symbol, Date and Type match an existing trade with a different
+    quantity or price are reported as conflicts and skipped.
+    
+    Args:
+        incoming_df: Validated import DataFrame
+        include_conflicts: Also append conflicting rows
+    
+    Returns:
+        tuple: (success, report dict with 'added' rows DataFrame, 'duplicates'
+        count and 'conflicts' DataFrame, or error message)
+    """
+    try:
+        ledger = st.session_state.get('transactions_df')
+        if ledger is None or ledger.empty:
+            replace_transactions(incoming_df.reset_index(drop=True))
+            return True, {'added': incoming_df, 'duplicates': 0, 'conflicts': incoming_df.iloc[:0]}
+        
+        index = get_ledger_index()
+        diff = diff_import(index, incoming_df)
+        skipped = diff['conflict'] & (not include_conflicts)
+        add = diff['new'] & ~skipped
+        added = incoming_df[add]
+        
+        if len(added):
+            st.session_state.transactions_df = pd.concat([ledger, added], ignore_index=True)
+            st.session_state['ledger_index'] = extend_ledger_index(
+                index, diff['keys'][add], diff['natural'][add]
+            )
+            # Appended rows only dirty the timeline from their earliest date; the
+            # XIRR solver cache picks appended rows up on its own
+            mark_ledger_changed(added['Date'].min())
+        
+        return True, {
+            'added': added,
+            'duplicates': int((~diff['new']).sum()),
+            'conflicts': incoming_df[diff['conflict']]
+        }
+    except Exception as e:
+        return False, f"Error merging transactions: {str(e)}"
+
+def mark_ledger_changed(from_date=None):
+    """
+    Record that the ledger changed so the portfolio timeline is brought up to date.
+
+    Args:
+        from_date: Earliest transaction date affected; None forces a full rebuild
+    """
+    if from_date is None or pd.isna(from_date):
+        st.session_state['portfolio_timeline'] = None
+        st.session_state['timeline_dirty_from'] = None
+        invalidate_xirr_cache(get_xirr_solver_cache())
+        return
+    
+    from_date = pd.Timestamp(from_date).normalize()
+    dirty_from = st.session_state.get('timeline_dirty_from')
+    if dirty_from is None or from_date < dirty_from:
+        st.session_state['timeline_dirty_from'] = from_date
+
+def get_xirr_solver_cache():
+    """Per-session XIRR solver state (cash-flow arrays and last converged rates)"""
+    if 'xirr_solver_cache' not in st.session_state:
+        st.session_state['xirr_solver_cache'] = {}
+    return st.session_state['xirr_solver_cache']
+
+def get_portfolio_timeline(prices=None):
+    """
+    Get the daily holdings/value/TWR timeline for the current ledger, recomputing
+    only from the checkpoint before the earliest pending edit. Holdings are valued
+    at historical closes when a local price store is available.
+
+    Args:
+        prices: Optional dictionary of {symbol: price} (defaults to session prices)
+    """
+    if prices is None:
+        prices = st.session_state.get('current_prices', {})
+    
+    timeline = update_timeline(
+        st.session_state.get('portfolio_timeline'),
+        st.session_state.get('transactions_df'),
+        st.session_state.get('timeline_dirty_from'),
+        prices,
+        price_store=open_price_store()
+    )
+    st.session_state['portfolio_timeline'] = timeline
+    st.session_state['timeline_dirty_from'] = None
+    return timeline
+
+def get_benchmark_prices(symbols, start_date):
+    """
+    Get daily closes for benchmark symbols. Histories come from the process-wide
+    price cache, so sessions comparing against the same benchmark share one copy.
+
+    Args:
+        symbols: Benchmark symbols
+        start_date: First date needed
+
+    Returns:
+        tuple: (success, (DataFrame of closes with one column per symbol, list
+        of symbols without history) or error message)
+    """
+    start_date = pd.Timestamp(start_date).normalize()
+    return get_price_matrix(list(symbols), start_date.strftime('%Y-%m-%d'))
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+NATURAL_KEY = ['Symbol', 'Date', 'Type']
+PRICE_DECIMALS = 6  # Quantities and prices are compared at this precision
+
+def _normalize_text(column):
+    """Trimmed upper-case strings, normalizing each distinct value once"""
+    codes, uniques = pd.factorize(column)
+    labels = pd.Index(uniques).astype(str).str.strip().str.upper()
+    return pd.Categorical(labels).take(codes, allow_fill=True)
+
+def normalize_ledger(transactions_df):
+    """Canonical form of ledger rows used for hashing: trimmed upper-case text, day dates, rounded numbers"""
+    return pd.DataFrame({
+        'Symbol': _normalize_text(transactions_df['Symbol']),
+        'Date': pd.to_datetime(transactions_df['Date']).dt.normalize(),
+        'Type': _normalize_text(transactions_df['Type']),
+        'Quantity': transactions_df['Quantity'].astype(float).round(PRICE_DECIMALS),
+        'Price': transactions_df['Price'].astype(float).round(PRICE_DECIMALS)
+    }, index=transactions_df.index)
+
+def _hash(frame):
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def _keys(row_hash, occurrence):
+    return _hash(pd.DataFrame({'row': row_hash, 'occurrence': occurrence}))
+
+def row_keys(normalized, occurrence_start=None):
+    """
+    Identity of each normalized row.
+
+    Identical rows are told apart by their occurrence ordinal, so a ledger with
+    two identical trades and a file with the same two trades map to the same keys.
+
+    Args:
+        normalized: DataFrame from normalize_ledger
+        occurrence_start: Optional per-row ordinal offset
+
+    Returns:
+        tuple: (row keys, natural (Symbol, Date, Type) keys, content hashes) as uint64 arrays
+    """
+    row_hash = _hash(normalized)
+    occurrence = np.zeros(len(row_hash), dtype=np.int64)
+    repeated = pd.Series(row_hash).duplicated(keep=False).to_numpy()
+    if repeated.any():
+        occurrence[repeated] = pd.Series(row_hash[repeated]).groupby(row_hash[repeated]).cumcount().to_numpy()
+    if occurrence_start is not None:
+        occurrence = occurrence + occurrence_start
+    return _keys(row_hash, occurrence), _hash(normalized[NATURAL_KEY]), row_hash
+
+def _contains(sorted_keys, keys):
+    """Membership of keys in a sorted key array"""
+    positions = np.searchsorted(sorted_keys, keys)
+    found = positions < len(sorted_keys)
+    found[found] = sorted_keys[positions[found]] == keys[found]
+    return found
+
+def build_ledger_index(transactions_df):
+    """
+    Hash index of a ledger's rows.
+
+    Returns:
+        dict: Sorted 'keys' and 'natural' key arrays and the number of 'rows' indexed
+    """
+    keys, natural, _ = row_keys(normalize_ledger(transactions_df))
+    return {
+        'keys': np.sort(keys),
+        'natural': np.sort(natural),
+        'rows': len(transactions_df)
+    }
+
+def extend_ledger_index(index, keys, natural):
+    """Add appended rows' keys to an index, returning the updated index"""
+    return {
+        'keys': np.insert(index['keys'], np.searchsorted(index['keys'], np.sort(keys)), np.sort(keys)),
+        'natural': np.insert(index['natural'], np.searchsorted(index['natural'], np.sort(natural)), np.sort(natural)),
+        'rows': index['rows'] + len(keys)
+    }
+
+def append_keys(index, new_rows):
+    """
+    Keys of rows appended outside an import (e.g. manual entry), numbered after
+    any identical rows already in the ledger.
+
+    Returns:
+        tuple: (row keys, natural keys) for new_rows
+    """
+    normalized = normalize_ledger(new_rows)
+    start = np.zeros(len(normalized), dtype=np.int64)
+    keys, natural, _ = row_keys(normalized)
+    # Rare: advance past identical rows the ledger already holds
+    while True:
+        taken = _contains(index['keys'], keys)
+        if not taken.any():
+            return keys, natural
+        start = start + taken
+        keys, natural, _ = row_keys(normalized, start)
+
+def diff_import(index, incoming_df):
+    """
+    Classify the rows of an import against a ledger index.
+
+    Args:
+        index: Index from build_ledger_index
+        incoming_df: Validated import DataFrame
+
+    Returns:
+        dict: Boolean arrays 'new' (rows not in the ledger) and 'conflict' (new
+        rows whose Symbol, Date and Type match an existing row with a different
+        quantity or price), plus the 'keys' and 'natural' keys of every row
+    """
+    keys, natural, row_hash = row_keys(normalize_ledger(incoming_df))
+    new = ~_contains(index['keys'], keys)
+
+    # Extra copies of a trade already in the ledger are new rows, not conflicts
+    conflict = np.zeros(len(keys), dtype=bool)
+    first_copy = _keys(row_hash[new], np.zeros(int(new.sum()), dtype=np.int64))
+    conflict[new] = _contains(index['natural'], natural[new]) & ~_contains(index['keys'], first_copy)
+    return {
+        'new': new,
+        'conflict': conflict,
+        'keys': keys,
+        'natural': natural
+    }
@@ -0,0 +1,238 @@
+import os
+import json
+import shutil
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.environ.get('PRICE_STORE_PATH', os.path.join('data', 'price_store'))
+
+PRICES_FILE = 'prices.npy'    # float64 (dates x symbols), column-major, NaN where missing
+DATES_FILE = 'dates.npy'      # datetime64[D] trading calendar, ascending
+SYMBOLS_FILE = 'symbols.json' # column order
+
+OPEN_ATTEMPTS = 3  # Re-resolve the store link this many times if a rewrite retires the version being read
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+class PriceStore:
+    """
+    Read-only, memory-mapped date x symbol closing price matrix.
+
+    The matrix is stored column-major so each symbol's history is contiguous and
+    column reads are zero-copy views. Pages are shared through the OS page cache
+    by every session and worker process that opens the same store.
+    """
+
+    def __init__(self, path, location=None):
+        """
+        Args:
+            path: Store path, a link to the current version directory
+            location: Version directory to read (default: where path points now)
+        """
+        self.path = path
+        location = location or os.path.realpath(path)
+        self.version = (location, os.stat(os.path.join(location, PRICES_FILE)).st_mtime_ns)
+        self.prices = np.load(os.path.join(location, PRICES_FILE), mmap_mode='r')
+        self.dates = np.load(os.path.join(location, DATES_FILE))
+        with open(os.path.join(location, SYMBOLS_FILE)) as f:
+            self.symbols = json.load(f)
+        if self.prices.shape != (len(self.dates), len(self.symbols)):
+            # Files from two writes: a pre-versioning store was replaced mid-read
+            raise FileNotFoundError(f"Price store at {location} was replaced while opening")
+        self.columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __contains__(self, symbol):
+        return symbol in self.columns
+
+    def column(self, symbol):
+        """Zero-copy view of one symbol's full price history"""
+        return self.prices[:, self.columns[symbol]]
+
+    def rows(self, start=None, end=None):
+        """Row slice covering the calendar dates from start to end inclusive"""
+        first = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'D'))
+        last = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'D'), side='right')
+        return slice(int(first), int(last))
+
+    def window(self, symbol, start=None, end=None):
+        """Zero-copy view of one symbol's prices between start and end"""
+        return self.column(symbol)[self.rows(start, end)]
+
+    def asof_rows(self, dates):
+        """
+        Row of the last trading day on or before each date (-1 before the calendar starts).
+
+        Args:
+            dates: Array-like of dates
+        """
+        dates = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+        return np.searchsorted(self.dates, dates, side='right') - 1
+
+    def asof(self, symbol, dates):
+        """
+        Last known price of a symbol on or before each date, NaN where unknown.
+
+        Gaps in a symbol's history are carried forward from its last close.
+        """
+        return self.asof_at_rows(symbol, self.asof_rows(dates))
+
+    def asof_at_rows(self, symbol, rows):
+        """Like asof, for rows already located with asof_rows"""
+        column = self.column(symbol)
+
+        # Index of the last non-missing observation at or before every calendar row
+        observed = np.where(~np.isnan(column), np.arange(len(column)), -1)
+        last_observed = np.maximum.accumulate(observed)
+
+        prices = np.full(len(rows), np.nan)
+        valid = rows >= 0
+        source = last_observed[rows[valid]]
+        prices[valid] = np.where(source >= 0, column[np.maximum(source, 0)], np.nan)
+        return prices
+
+    def frame(self, symbols=None, start=None, end=None):
+        """Materialize a DataFrame of prices (copies; prefer column/window for hot paths)"""
+        symbols = self.symbols if symbols is None else [s for s in symbols if s in self.columns]
+        rows = self.rows(start, end)
+        data = {symbol: self.column(symbol)[rows] for symbol in symbols}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.dates[rows]))
+
+def open_price_store(path=None):
+    """
+    Open the price store shared by this process, re-opening it if it was rewritten.
+
+    Args:
+        path: Store directory (default PRICE_STORE_PATH or data/price_store)
+
+    Returns:
+        PriceStore, or None if no store has been written
+    """
+    path = path or DEFAULT_STORE_PATH
+    for _ in range(OPEN_ATTEMPTS):
+        location = os.path.realpath(path)
+        try:
+            version = (location, os.stat(os.path.join(location, PRICES_FILE)).st_mtime_ns)
+        except FileNotFoundError:
+            if os.path.islink(path):
+                continue  # The link moved on while it was being resolved
+            return None
+
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is not None and store.version == version:
+                return store
+        try:
+            store = PriceStore(path, location)
+        except FileNotFoundError:
+            continue  # A concurrent rewrite retired this version; resolve the link again
+        with _stores_lock:
+            _stores[path] = store
+        return store
+    return None
+
+def write_price_store(price_history, path=None):
+    """
+    Write a price store from per-symbol close series, replacing any existing store.
+
+    Args:
+        price_history: Dictionary of {symbol: Series of closes indexed by date}
+        path: Store directory (default PRICE_STORE_PATH or data/price_store)
+
+    Returns:
+        PriceStore opened on the new files
+    """
+    path = path or DEFAULT_STORE_PATH
+    symbols = sorted(price_history)
+
+    normalized = {}
+    for symbol in symbols:
+        series = price_history[symbol].dropna()
+        index = pd.DatetimeIndex(series.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        series = pd.Series(series.to_numpy(dtype=float), index=index.normalize())
+        normalized[symbol] = series[~series.index.duplicated(keep='last')]
+
+    calendar = pd.DatetimeIndex([])
+    for series in normalized.values():
+        calendar = calendar.union(series.index)
+
+    prices = np.full((len(calendar), len(symbols)), np.nan, order='F')
+    for j, symbol in enumerate(symbols):
+        series = normalized[symbol]
+        prices[calendar.get_indexer(series.index), j] = series.to_numpy()
+
+    # Every write gets its own version directory and the store path is a symlink
+    # to the current one, swapped with a single os.replace: readers always find
+    # either the old or the new store, and concurrent writers never share a path
+    parent, name = os.path.split(os.path.abspath(path))
+    unique = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+    version_dir = os.path.join(parent, f"{name}-{unique}")
+    os.makedirs(version_dir)
+    np.save(os.path.join(version_dir, PRICES_FILE), prices)
+    np.save(os.path.join(version_dir, DATES_FILE), calendar.values.astype('datetime64[D]'))
+    with open(os.path.join(version_dir, SYMBOLS_FILE), 'w') as f:
+        json.dump(symbols, f)
+
+    previous = None
+    if os.path.islink(path):
+        previous = os.path.realpath(path)
+    elif os.path.isdir(path):
+        # A store from before versioning: move it aside once so the link can take its place
+        previous = os.path.join(parent, f"{name}-legacy-{unique}")
+        os.replace(path, previous)
+
+    link = os.path.join(parent, f".{name}.link-{unique}")
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, path)
+    # Readers that already mapped the retired files keep their pages
+    if previous is not None and previous != version_dir:
+        shutil.rmtree(previous, ignore_errors=True)
+
+    return open_price_store(path)
+
+def ingest_price_history(symbols, start_date, path=None):
+    """
+    Fetch historical closes for symbols and merge them into the price store.
+
+    Args:
+        symbols: Symbols to fetch
+        start_date: First date to fetch
+        path: Store directory (default PRICE_STORE_PATH or data/price_store)
+
+    Returns:
+        tuple: (success, list of symbols without history or error message)
+    """
+    from utils.stock_api import get_historical_prices
+
+    try:
+        store = open_price_store(path)
+        price_history = {}
+        if store is not None:
+            price_history = {
+                symbol: pd.Series(np.array(store.column(symbol)), index=pd.DatetimeIndex(store.dates))
+                for symbol in store.symbols
+            }
+
+        failed = []
+        for symbol in symbols:
+            success, history = get_historical_prices(symbol, start_date)
+            if not success or history.empty:
+                failed.append(symbol)
+                continue
+            history = history.copy()
+            history.index = pd.DatetimeIndex(history.index).tz_localize(None).normalize()
+            if symbol in price_history:
+                history = history.combine_first(price_history[symbol])
+            price_history[symbol] = history
+
+        if not price_history:
+            return False, f"No price history available for {', '.join(failed)}"
+
+        write_price_store(price_history, path)
+        return True, failed
+    except Exception as e:
+        return False, f"Error building price store: {str(e)}"
@@ -0,0 +1,129 @@
+import numpy as np
+from utils.stock_api import get_current_price
+
+RESYNC_EVERY = 1000  # Recompute the total from scratch after this many ticks
+
+class SimulatedTickSource:
+    """
+    Local random-walk ticker for exercising live mode without a market data feed.
+
+    Each poll moves a random subset of the subscribed symbols by a small
+    log-normal step from their last price.
+    """
+
+    def __init__(self, base_prices, volatility=0.002, tick_fraction=0.2, seed=None):
+        self.prices = {s: float(p) for s, p in base_prices.items() if p is not None}
+        self.volatility = volatility
+        self.tick_fraction = tick_fraction
+        self._rng = np.random.default_rng(seed)
+
+    def poll(self, symbols):
+        """Return {symbol: price} for the symbols that ticked since the last poll"""
+        symbols = [s for s in symbols if s in self.prices]
+        if not symbols:
+            return {}
+
+        ticked = self._rng.random(len(symbols)) < self.tick_fraction
+        moves = np.exp(self._rng.normal(0.0, self.volatility, int(ticked.sum())))
+
+        ticks = {}
+        for symbol, move in zip(np.asarray(symbols)[ticked], moves):
+            self.prices[symbol] *= move
+            ticks[symbol] = self.prices[symbol]
+        return ticks
+
+class PollingTickSource:
+    """
+    Tick source backed by a quote function, polling a rotating batch of symbols
+    per refresh so large books stay within the provider's rate limits.
+    """
+
+    def __init__(self, fetch_price=get_current_price, batch_size=20):
+        self.fetch_price = fetch_price
+        self.batch_size = batch_size
+        self._cursor = 0
+
+    def poll(self, symbols):
+        """Return {symbol: price} for every symbol in the next batch that the provider could price"""
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        start = self._cursor % len(symbols)
+        batch = (symbols[start:] + symbols[:start])[:self.batch_size]
+        self._cursor = start + len(batch)
+
+        ticks = {}
+        for symbol in batch:
+            success, price = self.fetch_price(symbol)
+            if success and price is not None:
+                ticks[symbol] = float(price)
+        return ticks
+
+def build_live_book(portfolio_df):
+    """
+    Build the array-backed book used for incremental revaluation.
+
+    Args:
+        portfolio_df: Holdings DataFrame from calculate_portfolio_value
+
+    Returns:
+        dict: Book with symbol positions, quantity/price/value arrays and total value
+    """
+    symbols = list(portfolio_df['Symbol'])
+    quantity = portfolio_df['Quantity'].to_numpy(dtype=float, copy=True)
+    price = portfolio_df['Current Price'].to_numpy(dtype=float, copy=True)
+    value = np.nan_to_num(quantity * price)
+
+    return {
+        'symbols': symbols,
+        'positions': {symbol: i for i, symbol in enumerate(symbols)},
+        'quantity': quantity,
+        'price': price,
+        'value': value,
+        'total': float(value.sum()),
+        'ticks_since_resync': 0
+    }
+
+def apply_ticks(book, ticks):
+    """
+    Apply price ticks to a live book, adjusting only the changed symbols' values
+    and the total by their deltas.
+
+    Args:
+        book: Book returned by build_live_book
+        ticks: Dictionary of {symbol: price}
+
+    Returns:
+        list: Symbols whose value changed
+    """
+    changed = [symbol for symbol in ticks if symbol in book['positions']]
+    if not changed:
+        return []
+
+    idx = np.fromiter((book['positions'][s] for s in changed), dtype=np.int64, count=len(changed))
+    new_price = np.fromiter((ticks[s] for s in changed), dtype=float, count=len(changed))
+    new_value = np.nan_to_num(book['quantity'][idx] * new_price)
+
+    book['total'] += float((new_value - book['value'][idx]).sum())
+    book['price'][idx] = new_price
+    book['value'][idx] = new_value
+
+    # Bound floating point drift from repeated delta updates
+    book['ticks_since_resync'] += len(changed)
+    if book['ticks_since_resync'] >= RESYNC_EVERY:
+        book['total'] = float(book['value'].sum())
+        book['ticks_since_resync'] = 0
+
+    return changed
+
+def book_allocation(book):
+    """
+    Current allocation weights of a live book.
+
+    Returns:
+        ndarray: Weight per symbol in book order, zeros if the book has no value
+    """
+    if book['total'] == 0:
+        return np.zeros_like(book['value'])
+    return book['value'] / book['total']
@@ -0,0 +1,201 @@
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from utils.stock_api import get_price_matrix
+
+TRADING_DAYS = 252
+COVARIANCE_CACHE_SIZE = 32  # Covariance estimates kept, least recently used evicted first
+
+_covariance_cache = OrderedDict()
+_covariance_lock = threading.Lock()
+
+def returns_matrix(price_matrix):
+    """
+    Daily simple returns from a date x symbol close matrix.
+
+    Returns are NaN before a symbol's history starts; gaps inside a history are
+    carried forward so a missing close does not produce a spurious return.
+    """
+    prices = price_matrix.sort_index()
+    returns = prices.ffill().pct_change(fill_method=None)
+    returns[prices.ffill().isna()] = np.nan
+    return returns.iloc[1:]
+
+def pairwise_covariance(returns):
+    """
+    Covariance and correlation over pairwise-complete observations.
+
+    Equivalent to DataFrame.cov() and DataFrame.corr(), computed with a few
+    matrix products instead of a loop over symbol pairs.
+
+    Args:
+        returns: (observations x symbols) array, NaN where unobserved
+
+    Returns:
+        tuple: (covariance, correlation) arrays, NaN where a pair has fewer than
+        two common observations
+    """
+    returns = np.asarray(returns, dtype=float)
+    observed = (~np.isnan(returns)).astype(float)
+    x = np.where(observed > 0, returns, 0.0)
+
+    count = observed.T @ observed          # common observations of each pair
+    sum_x = x.T @ observed                 # [i, j]: sum of x_i where x_j is observed
+    sum_xx = (x * x).T @ observed          # [i, j]: sum of x_i^2 where x_j is observed
+    sum_xy = x.T @ x
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_i = sum_x / count
+        mean_j = mean_i.T
+        cov = (sum_xy - count * mean_i * mean_j) / (count - 1)
+        var_i = (sum_xx - count * mean_i ** 2) / (count - 1)
+        corr = cov / np.sqrt(var_i * var_i.T)
+
+    cov[count < 2] = np.nan
+    corr[count < 2] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(count) >= 2, 1.0, np.nan))
+    return cov, np.clip(corr, -1.0, 1.0)
+
+def get_covariance(symbols, window_days=365, as_of=None):
+    """
+    Daily returns, covariance and correlation of symbols over a trailing window.
+
+    Estimates are cached by (symbol set, window, as-of date), so repeated risk
+    queries on the same holdings reuse them.
+
+    Args:
+        symbols: Symbols to include
+        window_days: Calendar days of history before as_of
+        as_of: Last date of the window (default today)
+
+    Returns:
+        tuple: (success, dict with 'symbols', 'returns', 'cov', 'corr' and
+        'missing', or error message)
+    """
+    as_of = pd.Timestamp(as_of or pd.Timestamp.now()).normalize()
+    key = (frozenset(symbols), int(window_days), as_of)
+    with _covariance_lock:
+        if key in _covariance_cache:
+            _covariance_cache.move_to_end(key)
+            return True, _covariance_cache[key]
+
+    start = (as_of - pd.Timedelta(days=int(window_days))).strftime('%Y-%m-%d')
+    success, result = get_price_matrix(sorted(symbols), start, as_of + pd.Timedelta(days=1))
+    if not success:
+        return False, result
+    prices, missing = result
+
+    returns = returns_matrix(prices)
+    if len(returns) < 2:
+        return False, "Not enough price history to estimate risk"
+    cov, corr = pairwise_covariance(returns.to_numpy())
+
+    estimate = {
+        'symbols': list(returns.columns),
+        'returns': returns,
+        'cov': cov,
+        'corr': corr,
+        'missing': missing
+    }
+    with _covariance_lock:
+        _covariance_cache[key] = estimate
+        while len(_covariance_cache) > COVARIANCE_CACHE_SIZE:
+            _covariance_cache.popitem(last=False)
+    return True, estimate
+
+def portfolio_risk(values, returns, cov, confidence=0.95, horizon_days=1):
+    """
+    Volatility, VaR, CVaR and risk contributions of a portfolio.
+
+    Args:
+        values: Current value of each holding, aligned with the columns of returns
+        returns: (observations x symbols) daily returns, NaN where unobserved
+        cov: Daily return covariance matrix
+        confidence: VaR confidence level, e.g. 0.95
+        horizon_days: Holding period in trading days (square-root-of-time scaling)
+
+    Returns:
+        dict: Annualized 'volatility', historical and parametric 'var'/'cvar'
+        in currency, and per-symbol 'weights', 'marginal' and 'contribution'
+        (share of portfolio volatility)
+    """
+    values = np.asarray(values, dtype=float)
+    total = values.sum()
+    weights = values / total
+    cov = np.nan_to_num(cov)
+
+    sigma_daily = np.sqrt(weights @ cov @ weights)
+    scale = np.sqrt(horizon_days)
+
+    # Historical: the portfolio's own daily return series, unobserved symbols contributing zero
+    portfolio_returns = np.nan_to_num(np.asarray(returns, dtype=float)) @ weights
+    cutoff = np.quantile(portfolio_returns, 1 - confidence)
+    tail = portfolio_returns[portfolio_returns <= cutoff]
+    historical_var = -cutoff * scale * total
+    historical_cvar = -tail.mean() * scale * total
+
+    # Parametric: normal returns with the sample mean and covariance volatility
+    mu = portfolio_returns.mean() * horizon_days
+    sigma = sigma_daily * scale
+    z = NormalDist().inv_cdf(confidence)
+    parametric_var = (z * sigma - mu) * total
+    parametric_cvar = (sigma * NormalDist().pdf(z) / (1 - confidence) - mu) * total
+
+    # Euler decomposition: contributions sum to the portfolio volatility
+    if sigma_daily > 0:
+        marginal = cov @ weights / sigma_daily
+        contribution = weights * marginal / sigma_daily
+    else:
+        marginal = np.zeros_like(weights)
+        contribution = np.zeros_like(weights)
+
+    return {
+        'volatility': sigma_daily * np.sqrt(TRADING_DAYS),
+        'historical_var': historical_var,
+        'historical_cvar': historical_cvar,
+        'parametric_var': parametric_var,
+        'parametric_cvar': parametric_cvar,
+        'weights': weights,
+        'symbol_volatility': np.sqrt(np.diag(cov)) * np.sqrt(TRADING_DAYS),
+        'marginal': marginal * np.sqrt(TRADING_DAYS),
+        'contribution': contribution
+    }
+
+def calculate_portfolio_risk(portfolio_df, window_days=365, confidence=0.95, horizon_days=1, as_of=None):
+    """
+    Risk of current holdings from their trailing price history.
+
+    Args:
+        portfolio_df: Holdings DataFrame from calculate_portfolio_value
+        window_days: Calendar days of history used for the estimates
+        confidence: VaR confidence level
+        horizon_days: VaR holding period in trading days
+        as_of: Last date of the window (default today)
+
+    Returns:
+        tuple: (success, risk dict from portfolio_risk plus 'symbols', 'corr'
+        and 'excluded' symbols without a value or price history, or error message)
+    """
+    holdings = portfolio_df.dropna(subset=['Current Value'])
+    holdings = holdings[holdings['Current Value'] > 0]
+    if holdings.empty:
+        return False, "No priced holdings to analyze"
+
+    success, estimate = get_covariance(list(holdings['Symbol']), window_days, as_of)
+    if not success:
+        return False, estimate
+
+    symbols = estimate['symbols']
+    if not symbols:
+        return False, "No price history available for current holdings"
+    values = holdings.set_index('Symbol')['Current Value'].reindex(symbols).to_numpy()
+
+    risk = portfolio_risk(
+        values, estimate['returns'].to_numpy(), estimate['cov'], confidence, horizon_days
+    )
+    risk['symbols'] = symbols
+    risk['corr'] = estimate['corr']
+    risk['excluded'] = sorted(set(portfolio_df['Symbol']) - set(symbols))
+    return True, risk
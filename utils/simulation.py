@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_BYTES = 64 * 2**20  # Upper bound on the per-chunk path array
+VARIANCE_KEPT = 0.9999    # Share of covariance kept by the factor decomposition
+
+def estimate_return_model(price_matrix, periods_per_year=TRADING_DAYS):
+    """
+    Estimate annualized log-return means and covariance from daily closes.
+
+    Args:
+        price_matrix: DataFrame of closes indexed by date, one column per symbol
+        periods_per_year: Observations per year in price_matrix
+
+    Returns:
+        dict: 'symbols', annualized 'mu' vector and 'cov' matrix, or None if
+        there are fewer than two observations
+    """
+    prices = price_matrix.ffill().to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.diff(np.log(prices), axis=0)
+    if len(log_returns) < 2:
+        return None
+
+    # Pairwise-complete moments so symbols with shorter histories still contribute
+    returns = pd.DataFrame(log_returns, columns=price_matrix.columns)
+    mu = returns.mean().to_numpy() * periods_per_year
+    cov = returns.cov().to_numpy() * periods_per_year
+
+    return {
+        'symbols': list(price_matrix.columns),
+        'mu': np.nan_to_num(mu),
+        'cov': np.nan_to_num(cov)
+    }
+
+def _factor_loadings(cov, variance_kept=VARIANCE_KEPT):
+    """
+    Low-rank square root of a covariance matrix.
+
+    Pairwise estimates need not be positive semi-definite, so negative
+    eigenvalues are clipped, and only the leading factors explaining
+    variance_kept of the total are returned.
+
+    Returns:
+        ndarray: Loadings L (n x k) with L @ L.T approximating cov
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    eigenvalues = np.clip(eigenvalues, 0.0, None)[::-1]
+    eigenvectors = eigenvectors[:, ::-1]
+
+    total = eigenvalues.sum()
+    if total == 0:
+        return np.zeros((len(cov), 1))
+    k = int(np.searchsorted(np.cumsum(eigenvalues) / total, variance_kept) + 1)
+    k = min(k, len(eigenvalues))
+    return eigenvectors[:, :k] * np.sqrt(eigenvalues[:k])
+
+def simulate_portfolio_paths(values, mu, cov, years=10, n_paths=10000, steps_per_year=1,
+                             percentiles=DEFAULT_PERCENTILES, seed=None, chunk_paths=None):
+    """
+    Simulate buy-and-hold portfolio value with correlated log-normal returns.
+
+    Paths are generated in chunks as (paths, steps, factors) arrays and mapped
+    onto symbols through a low-rank factor decomposition of cov, so memory
+    stays bounded and no Python loop runs per path or per symbol.
+
+    Args:
+        values: Current value of each holding
+        mu: Annualized mean log return of each holding
+        cov: Annualized covariance of log returns
+        years: Projection horizon in years
+        n_paths: Number of simulated paths
+        steps_per_year: Time steps per year (1 = annual, 12 = monthly)
+        percentiles: Percentiles of portfolio value to report
+        seed: Optional random seed
+        chunk_paths: Paths per chunk (default sized to CHUNK_BYTES)
+
+    Returns:
+        dict: 'times' in years, {percentile: value path} 'bands', 'terminal'
+        values of every path and 'initial' portfolio value
+    """
+    values = np.asarray(values, dtype=float)
+    mu = np.asarray(mu, dtype=float)
+    steps = int(round(years * steps_per_year))
+    dt = 1.0 / steps_per_year
+
+    # Paths are simulated in single precision, which halves the cost of the
+    # draws and the factor product; results are accumulated in double
+    loadings = (_factor_loadings(np.asarray(cov, dtype=float)) * np.sqrt(dt)).astype(np.float32)
+    drift = (mu * dt).astype(np.float32)
+    weights = values.astype(np.float32)
+    n_assets = len(values)
+
+    if chunk_paths is None:
+        chunk_paths = max(1, CHUNK_BYTES // (4 * max(steps, 1) * max(n_assets, loadings.shape[1])))
+
+    rng = np.random.default_rng(seed)
+    portfolio = np.empty((n_paths, steps))
+
+    for start in range(0, n_paths, chunk_paths):
+        size = min(chunk_paths, n_paths - start)
+        shocks = rng.standard_normal((size, steps, loadings.shape[1]), dtype=np.float32)
+        log_returns = shocks @ loadings.T
+        log_returns += drift
+        np.cumsum(log_returns, axis=1, out=log_returns)
+        np.exp(log_returns, out=log_returns)
+        portfolio[start:start + size] = log_returns @ weights
+
+    initial = float(values.sum())
+    bands = {
+        p: np.concatenate([[initial], band])
+        for p, band in zip(percentiles, np.percentile(portfolio, percentiles, axis=0))
+    }
+
+    return {
+        'times': np.arange(steps + 1) * dt,
+        'bands': bands,
+        'terminal': portfolio[:, -1],
+        'initial': initial
+    }
+
+def project_portfolio(portfolio_df, price_matrix, years=10, n_paths=10000, steps_per_year=1, seed=None):
+    """
+    Monte Carlo projection of current holdings from their historical prices.
+
+    Args:
+        portfolio_df: Holdings DataFrame from calculate_portfolio_value
+        price_matrix: DataFrame of historical closes, one column per symbol
+        years: Projection horizon in years
+        n_paths: Number of simulated paths
+        steps_per_year: Time steps per year
+        seed: Optional random seed
+
+    Returns:
+        tuple: (success, simulation dict or error message); the dict also lists
+        the 'excluded' symbols that had no value or price history
+    """
+    holdings = portfolio_df.dropna(subset=['Current Value'])
+    holdings = holdings[holdings['Current Value'] > 0]
+    covered = [s for s in holdings['Symbol'] if s in price_matrix.columns]
+    excluded = sorted(set(portfolio_df['Symbol']) - set(covered))
+    if not covered:
+        return False, "No current holdings have price history to simulate"
+
+    model = estimate_return_model(price_matrix[covered])
+    if model is None:
+        return False, "Not enough price history to estimate returns"
+
+    values = holdings.set_index('Symbol')['Current Value'].reindex(covered).to_numpy()
+    result = simulate_portfolio_paths(
+        values, model['mu'], model['cov'],
+        years=years, n_paths=n_paths, steps_per_year=steps_per_year, seed=seed
+    )
+    result['excluded'] = excluded
+    return True, result
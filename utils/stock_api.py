@@ -1,8 +1,129 @@
-import yfinance as yf
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
 import pandas as pd
 from datetime import datetime, timedelta
 
+QUOTE_TTL_SECONDS = 15            # Current prices are shared for this long
+HISTORY_TTL_SECONDS = 6 * 60 * 60 # Historical closes are shared for this long
+ERROR_TTL_SECONDS = 10            # Failed lookups are not retried for this long
+CACHE_MAX_BYTES = int(os.environ.get('STOCK_CACHE_MAX_MB', 256)) * 2**20
+
+class PriceCache:
+    """
+    Thread-safe, process-wide cache of provider results.
+
+    Entries expire after a per-entry TTL and the least recently used entries
+    are evicted once the estimated size exceeds max_bytes. Concurrent requests
+    for the same key wait for a single fetch instead of each calling the
+    provider. Cached values are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {key: (result, expires at, size)}
+        self._inflight = {}            # {key: (Event, [result])}
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    def peek(self, key):
+        """Cached result for key, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def get_or_fetch(self, key, fetch, ttl, error_ttl=ERROR_TTL_SECONDS):
+        """
+        Cached (success, value) result for key, calling fetch on a miss.
+
+        Args:
+            key: Hashable cache key
+            fetch: Callable returning a (success, value) tuple
+            ttl: Seconds a successful result is reused
+            error_ttl: Seconds a failed result is reused
+        """
+        result = self.peek(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = (threading.Event(), [None])
+                self._inflight[key] = call
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        event, holder = call
+        if not owner:
+            event.wait()
+            return holder[0]
+
+        try:
+            holder[0] = fetch()
+        except Exception as e:
+            holder[0] = (False, f"Error fetching {key}: {str(e)}")
+        finally:
+            with self._lock:
+                if holder[0] is not None:
+                    self._store(key, holder[0], ttl if holder[0][0] else error_ttl)
+                del self._inflight[key]
+            event.set()
+        return holder[0]
+
+    def _store(self, key, result, ttl):
+        size = _estimate_size(result[1])
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[key] = (result, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats['evictions'] += 1
+
+    def stats(self):
+        """Hit, miss, coalesced-request and eviction counts plus current size"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+def _estimate_size(value):
+    """Approximate memory held by a cached value"""
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    return sys.getsizeof(value)
+
+price_cache = PriceCache()
+
+def get_cache_stats():
+    """Statistics of the process-wide quote and history cache"""
+    return price_cache.stats()
+
 def get_current_price(symbol):
+    return price_cache.get_or_fetch(
+        ('quote', symbol), lambda: _fetch_current_price(symbol), QUOTE_TTL_SECONDS
+    )
+
+def _fetch_current_price(symbol):
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(symbol)
         current_price = stock.info['regularMarketPrice']
@@ -11,6 +132,14 @@ def get_current_price(symbol):
         return False, f"Error fetching price for {symbol}: {str(e)}"
 
 def get_historical_prices(symbol, start_date, end_date=None):
+    key = ('history', symbol, str(start_date), None if end_date is None else str(end_date))
+    return price_cache.get_or_fetch(
+        key, lambda: _fetch_historical_prices(symbol, start_date, end_date), HISTORY_TTL_SECONDS
+    )
+
+def _fetch_historical_prices(symbol, start_date, end_date=None):
+    import yfinance as yf
+
     try:
         if end_date is None:
             end_date = datetime.now()
@@ -22,6 +151,8 @@ def get_historical_prices(symbol, start_date, end_date=None):
         return False, f"Error fetching historical prices for {symbol}: {str(e)}"
 
 def validate_symbol(symbol):
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(symbol)
         # Try to get info - will fail if symbol is invalid
@@ -47,4 +178,37 @@ def get_current_prices(symbols):
     except Exception as e:
         return False, f"Error fetching prices: {str(e)}"
 
+def get_price_matrix(symbols, start_date, end_date=None):
+    """
+    Get aligned daily closes for multiple symbols, reading the local price store
+    where it covers a symbol and fetching the rest
+    Returns a DataFrame indexed by date with one column per symbol, and the list
+    of symbols without any history
+    """
+    from utils.price_store import open_price_store
+    
+    try:
+        store = open_price_store()
+        columns = {}
+        missing = []
+        for symbol in symbols:
+            if store is not None and symbol in store:
+                rows = store.rows(start_date, end_date)
+                columns[symbol] = pd.Series(store.column(symbol)[rows], index=pd.DatetimeIndex(store.dates[rows]))
+                continue
+            
+            success, history = get_historical_prices(symbol, start_date, end_date)
+            if not success or len(history) == 0:
+                missing.append(symbol)
+                continue
+            index = pd.DatetimeIndex(history.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            columns[symbol] = pd.Series(history.to_numpy(dtype=float), index=index.normalize())
+        
+        prices = pd.DataFrame(columns).sort_index()
+        return True, (prices.dropna(how='all'), missing)
+    except Exception as e:
+        return False, f"Error fetching price history: {str(e)}"
+
 # print(get_historical_prices('MSFT', '2025-01-01', '2025-02-26')) 
\ No newline at end of file
@@ -0,0 +1,233 @@
+import os
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.xirr_solver import solve_xirr
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+NS_PER_YEAR = 365 * NS_PER_DAY
+NAT = np.datetime64('NaT').astype(np.int64)  # int64 value of a missing date
+
+# Below this many symbols the pool start-up and pickling cost more than they save
+PARALLEL_MIN_SYMBOLS = 50
+
+_pool = None
+_pool_workers = 0
+
+def default_worker_count():
+    """Worker count from the ANALYTICS_WORKERS environment variable, else one per CPU"""
+    configured = os.environ.get('ANALYTICS_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+def weighted_holding_time_from_arrays(dates, is_buy, quantity, price, now, current_price):
+    """
+    FIFO-matched weighted average holding time in days for one symbol.
+
+    Open quantity is closed by a virtual sell at current_price dated now.
+
+    Args:
+        dates: Transaction timestamps as int64 nanoseconds
+        is_buy: Boolean array, True for buys
+        quantity: Transaction quantities
+        price: Transaction prices
+        now: Timestamp of the virtual sell as int64 nanoseconds
+        current_price: Current price of the symbol (NaN if unknown)
+
+    Returns:
+        float: Weighted average holding time in days, None if nothing was matched
+    """
+    held = np.sum(np.where(is_buy, quantity, -quantity))
+    if held > 0:
+        dates = np.append(dates, now)
+        is_buy = np.append(is_buy, False)
+        quantity = np.append(quantity, held)
+        price = np.append(price, current_price)
+
+    order = np.argsort(dates, kind='stable')
+
+    total_weighted_time = 0
+    total_cash_flow_abs = 0
+    buy_queue = []  # [date, remaining quantity]
+
+    for i in order:
+        if is_buy[i]:
+            buy_queue.append([dates[i], quantity[i]])
+            continue
+
+        remaining_sell_qty = quantity[i]
+        while remaining_sell_qty > 0 and buy_queue:
+            buy = buy_queue[0]
+            match_qty = min(buy[1], remaining_sell_qty)
+            holding_time_days = (dates[i] - buy[0]) // NS_PER_DAY
+
+            cash_flow = match_qty * price[i]
+            total_weighted_time += cash_flow * holding_time_days
+            total_cash_flow_abs += cash_flow
+
+            remaining_sell_qty -= match_qty
+            buy[1] -= match_qty
+            if buy[1] <= 0:
+                buy_queue.pop(0)
+
+    if total_cash_flow_abs > 0:
+        return total_weighted_time / total_cash_flow_abs
+    return None
+
+def compute_symbol_metrics(payload):
+    """
+    XIRR, simple return and holding time for one symbol's array payload.
+
+    Args:
+        payload: dict from partition_ledger_by_symbol
+
+    Returns:
+        dict: Numeric per-symbol results, None for metrics that could not be computed
+    """
+    dates = payload['dates']
+    is_buy = payload['is_buy']
+    quantity = payload['quantity']
+    price = payload['price']
+    now = payload['now']
+    current_price = payload['current_price']
+    quote = np.nan if current_price is None else current_price
+
+    # Rows without a valid date are left out of the dated metrics, as in the
+    # portfolio XIRR and the timeline
+    dated = dates != NAT
+
+    # XIRR: signed flows plus the current value of any open position (zero if
+    # unpriced), dated today, warm-started from the previous solution if any
+    amounts = np.where(is_buy, -quantity * price, quantity * price)[dated]
+    flow_dates = dates[dated] - dates[dated] % NS_PER_DAY
+    held = np.sum(np.where(is_buy, quantity, -quantity)[dated])
+    if held > 0:
+        amounts = np.append(amounts, np.nan_to_num(held * quote))
+        flow_dates = np.append(flow_dates, now - now % NS_PER_DAY)
+    xirr = None
+    if len(flow_dates):
+        years = (flow_dates - flow_dates[0]) / NS_PER_YEAR
+        xirr = solve_xirr(amounts, years, warm_start=payload.get('xirr_guess'))
+
+    # Simple return against average cost
+    total_quantity = quantity.sum()
+    total_cost = (quantity * price).sum()
+    current_price = 0 if current_price is None else current_price
+    if total_quantity > 0:
+        avg_cost = total_cost / total_quantity
+        total_return = ((current_price / avg_cost) - 1) * 100
+    else:
+        avg_cost = 0
+        total_return = 0
+
+    holding_time = weighted_holding_time_from_arrays(
+        dates[dated], is_buy[dated], quantity[dated], price[dated], now, quote
+    )
+
+    annualized_return = None
+    if holding_time is not None and holding_time > 0 and total_return != 0:
+        holding_time_years = holding_time / 365.0
+        annualized_return = ((1 + (total_return / 100)) ** (1 / holding_time_years)) - 1
+
+    return {
+        'Symbol': payload['symbol'],
+        'Avg Cost': avg_cost,
+        'Current Price': current_price,
+        'Avg Holding Time': holding_time,
+        'Total Return': total_return,
+        'Annualized Return': annualized_return,
+        'XIRR': xirr
+    }
+
+def partition_ledger_by_symbol(transactions_df, current_prices, xirr_guesses=None):
+    """
+    Split the ledger into compact per-symbol array payloads in first-seen symbol order.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        current_prices: Dictionary of {symbol: price}
+        xirr_guesses: Optional dictionary of {symbol: last converged XIRR}
+
+    Returns:
+        list: One payload dict of NumPy arrays per symbol
+    """
+    codes, symbols = pd.factorize(transactions_df['Symbol'])
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+
+    dates = pd.to_datetime(transactions_df['Date']).to_numpy('datetime64[ns]').astype(np.int64)
+    is_buy = (transactions_df['Type'] == 'BUY').to_numpy()
+    quantity = transactions_df['Quantity'].to_numpy(dtype=float)
+    price = transactions_df['Price'].to_numpy(dtype=float)
+    now = pd.Timestamp.now().value
+    xirr_guesses = xirr_guesses or {}
+
+    return [
+        {
+            'symbol': symbol,
+            'dates': dates[rows],
+            'is_buy': is_buy[rows],
+            'quantity': quantity[rows],
+            'price': price[rows],
+            'now': now,
+            'current_price': current_prices.get(symbol),
+            'xirr_guess': xirr_guesses.get(symbol)
+        }
+        for symbol, rows in zip(symbols, np.split(order, boundaries))
+    ]
+
+def _get_pool(workers):
+    """Reuse one process pool across reruns, recreating it if the worker count changes"""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        _shutdown_pool()
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+        _pool_workers = workers
+    return _pool
+
+def _shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+atexit.register(_shutdown_pool)
+
+def calculate_symbol_metrics(transactions_df, current_prices, workers=None, xirr_guesses=None):
+    """
+    Per-symbol XIRR, simple return and holding time, optionally on a process pool.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        current_prices: Dictionary of {symbol: price}
+        workers: Number of worker processes (default from default_worker_count);
+            1 runs serially
+        xirr_guesses: Optional dictionary of {symbol: last converged XIRR} used
+            to warm-start each symbol's solver
+
+    Returns:
+        list: Per-symbol result dicts in first-seen symbol order
+    """
+    if transactions_df is None or transactions_df.empty:
+        return []
+
+    payloads = partition_ledger_by_symbol(transactions_df, current_prices, xirr_guesses)
+    if workers is None:
+        workers = default_worker_count()
+    workers = min(workers, len(payloads))
+
+    if workers > 1 and len(payloads) >= PARALLEL_MIN_SYMBOLS:
+        try:
+            chunksize = max(1, len(payloads) // (workers * 4))
+            return list(_get_pool(workers).map(compute_symbol_metrics, payloads, chunksize=chunksize))
+        except Exception:
+            # Broken or unavailable pool: fall back to the serial path
+            _shutdown_pool()
+
+    return [compute_symbol_metrics(payload) for payload in payloads]
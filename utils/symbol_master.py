@@ -0,0 +1,145 @@
+import os
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from utils.stock_api import validate_symbol
+
+DEFAULT_MASTER_PATH = os.environ.get('SYMBOL_MASTER_PATH', os.path.join('data', 'symbols.csv'))
+REFRESH_SECONDS = 15 * 60  # How often to check the master file for changes
+REMOTE_WORKERS = 8         # Concurrent remote lookups for symbols missing from the master
+
+_lock = threading.Lock()
+_index = {
+    'path': None,
+    'mtime': None,
+    'checked_at': 0.0,
+    'names': {},      # {symbol: security name}
+    'sorted': [],     # symbols in sorted order, for prefix search
+    'confirmed': set(), # symbols confirmed by the remote provider since start-up
+    'rejected': {}      # {symbol: (error message, time)} recently rejected by the provider
+}
+
+def _normalize(symbol):
+    return str(symbol).strip().upper()
+
+def _load(path):
+    """Read a symbol master CSV with a Symbol column and an optional Name column"""
+    master = pd.read_csv(path, dtype=str, keep_default_na=False)
+    symbols = master['Symbol'].str.strip().str.upper()
+    names = master['Name'] if 'Name' in master.columns else pd.Series('', index=master.index)
+    return dict(zip(symbols, names))
+
+def _get_index(path=None):
+    """Return the in-process index, reloading the master file if it changed"""
+    path = path or DEFAULT_MASTER_PATH
+    now = time.monotonic()
+    with _lock:
+        if _index['path'] == path and now - _index['checked_at'] < REFRESH_SECONDS:
+            return _index
+
+        _index['checked_at'] = now
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if _index['path'] != path or _index['mtime'] != mtime:
+            names = _load(path) if mtime is not None else {}
+            names.update((symbol, '') for symbol in _index['confirmed'] if symbol not in names)
+            _index['names'] = names
+            _index['sorted'] = sorted(names)
+            _index['path'] = path
+            _index['mtime'] = mtime
+        return _index
+
+def _remember(symbols, rejected):
+    """Add remotely confirmed symbols to the in-process index and note rejected ones"""
+    now = time.monotonic()
+    with _lock:
+        _index['rejected'].update((symbol, (msg, now)) for symbol, msg in rejected.items())
+        _index['confirmed'].update(symbols)
+        new = [symbol for symbol in symbols if symbol not in _index['names']]
+        for symbol in new:
+            _index['names'][symbol] = ''
+            bisect.insort(_index['sorted'], symbol)
+
+def is_known_symbol(symbol, path=None):
+    """O(1) check of a symbol against the local symbol master"""
+    return _normalize(symbol) in _get_index(path)['names']
+
+def suggest_symbols(prefix, limit=10, path=None):
+    """
+    Symbols starting with prefix, in alphabetical order.
+
+    Args:
+        prefix: Leading characters typed by the user
+        limit: Maximum number of suggestions
+
+    Returns:
+        list: Matching (symbol, name) tuples
+    """
+    prefix = _normalize(prefix)
+    if not prefix:
+        return []
+
+    index = _get_index(path)
+    symbols = index['sorted']
+    start = bisect.bisect_left(symbols, prefix)
+    matches = []
+    for symbol in symbols[start:start + limit]:
+        if not symbol.startswith(prefix):
+            break
+        matches.append((symbol, index['names'][symbol]))
+    return matches
+
+def validate_symbols(symbols, path=None):
+    """
+    Validate many symbols at once against the local master, looking up only
+    unknown symbols with the remote provider.
+
+    Args:
+        symbols: Iterable of symbols (duplicates are checked once)
+
+    Returns:
+        tuple: (set of valid symbols, {invalid symbol: error message})
+    """
+    unique = {_normalize(symbol) for symbol in symbols}
+    names = _get_index(path)['names']
+
+    valid = {symbol for symbol in unique if symbol in names}
+    invalid = {}
+
+    # Symbols the provider rejected recently are not looked up again
+    now = time.monotonic()
+    for symbol in unique - valid:
+        rejection = _index['rejected'].get(symbol)
+        if rejection is not None and now - rejection[1] < REFRESH_SECONDS:
+            invalid[symbol] = rejection[0]
+    unknown = sorted(unique - valid - set(invalid))
+
+    if unknown:
+        with ThreadPoolExecutor(max_workers=min(REMOTE_WORKERS, len(unknown))) as executor:
+            results = list(executor.map(validate_symbol, unknown))
+        confirmed = []
+        rejected = {}
+        for symbol, (success, msg) in zip(unknown, results):
+            if success:
+                confirmed.append(symbol)
+            else:
+                rejected[symbol] = msg
+        _remember(confirmed, rejected)
+        invalid.update(rejected)
+        valid.update(confirmed)
+
+    return valid, invalid
+
+def validate_symbol_offline_first(symbol, path=None):
+    """
+    Validate one symbol, consulting the remote provider only if the local
+    master does not know it.
+
+    Returns:
+        tuple: (success, message)
+    """
+    valid, invalid = validate_symbols([symbol], path)
+    if valid:
+        return True, "Valid symbol"
+    return False, next(iter(invalid.values()))
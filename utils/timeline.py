@@ -0,0 +1,387 @@
+import pandas as pd
+import numpy as np
+
+def _prices_key(prices, price_store=None):
+    """Fingerprint of the prices used for valuation, to detect price changes"""
+    store_key = None if price_store is None else (price_store.path, price_store.version)
+    if prices is None:
+        return (None, store_key)
+    if isinstance(prices, pd.DataFrame):
+        return (int(pd.util.hash_pandas_object(prices, index=True).sum()), store_key)
+    return (hash(frozenset(prices.items())), store_key)
+
+def _value_holdings(holdings, prices, price_store=None, trade_prices=None):
+    """
+    Value a daily holdings matrix.
+
+    Args:
+        holdings: DataFrame of quantities indexed by date with one column per symbol
+        prices: Dictionary of {symbol: price} or DataFrame of prices by date and symbol
+        price_store: Optional PriceStore; symbols it covers are valued at their
+            historical close, falling back to the prices below before their history starts
+        trade_prices: Optional DataFrame of each symbol's last trade price by date;
+            with a price dictionary, past dates are valued at these and only the
+            last date at the current prices
+
+    Returns:
+        Series of portfolio value by date
+    """
+    if holdings.empty:
+        return pd.Series(0.0, index=holdings.index)
+    return _position_values(holdings, prices, price_store, trade_prices).sum(axis=1)
+
+def _position_values(holdings, prices, price_store=None, trade_prices=None):
+    """Value of each position in a holdings matrix, with the same pricing rules as _value_holdings"""
+    # Only long positions are valued, as in calculate_portfolio_value
+    quantities = holdings.clip(lower=0)
+
+    if isinstance(prices, pd.DataFrame):
+        price_matrix = (
+            prices.reindex(columns=quantities.columns)
+            .reindex(quantities.index, method='ffill')
+            .fillna(0.0)
+        )
+        return quantities * price_matrix
+
+    fallback = _fallback_prices(quantities, prices, trade_prices)
+
+    if price_store is not None:
+        return _values_with_store(quantities, fallback, price_store)
+    return quantities * fallback.fillna(0.0)
+
+def _last_trade_prices(tx, dates, symbols, start_prices):
+    """
+    Last trade price of each symbol on or before each date, NaN before its first trade.
+
+    Args:
+        tx: Transactions dated within dates
+        dates: Days of the segment
+        symbols: Columns of the result
+        start_prices: Series of last trade prices by symbol before the segment
+    """
+    last = tx.groupby(['Date', 'Symbol'])['Price'].last().unstack()
+    last = last.reindex(index=dates, columns=symbols)
+    if len(last):
+        last.iloc[0] = last.iloc[0].fillna(start_prices.reindex(symbols))
+    return last.ffill()
+
+def _fallback_prices(quantities, prices, trade_prices=None):
+    """
+    Price matrix for dates without a historical close: the last trade price on
+    or before each date, and the current price on the last date.
+
+    Without trade prices every date is valued at the current price.
+    """
+    quotes = pd.Series(prices or {}, dtype=float).reindex(quantities.columns)
+    if trade_prices is None:
+        return pd.DataFrame(
+            np.tile(quotes.to_numpy(), (len(quantities), 1)),
+            index=quantities.index, columns=quantities.columns
+        )
+
+    matrix = trade_prices.reindex(index=quantities.index, columns=quantities.columns)
+    if len(matrix):
+        matrix.iloc[-1] = quotes.fillna(matrix.iloc[-1])
+    return matrix
+
+def _values_with_store(quantities, fallback, price_store):
+    """Value holdings against memory-mapped closes, reading one column view per symbol"""
+    rows = price_store.asof_rows(quantities.index)
+    values = np.zeros(quantities.shape, order='F')
+
+    for j, symbol in enumerate(quantities.columns):
+        held = quantities[symbol].to_numpy()
+        close = fallback[symbol].to_numpy(dtype=float)
+        if symbol in price_store:
+            stored = price_store.asof_at_rows(symbol, rows)
+            close = np.where(np.isnan(stored), close, stored)
+        values[:, j] = np.nan_to_num(held * close)
+
+    return pd.DataFrame(values, index=quantities.index, columns=quantities.columns)
+
+def _growth_index(value, flows, prev_value, prev_index):
+    """Chain daily time-weighted returns onto the index level before the segment"""
+    previous = value.shift(1)
+    if len(previous):
+        previous.iloc[0] = prev_value
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_return = np.where(previous > 0, (value - flows) / previous - 1, 0.0)
+
+    return pd.Series(prev_index * np.cumprod(1 + daily_return), index=value.index)
+
+def _compute_segment(transactions_df, start_date, start_holdings, end_date, start_trade_prices):
+    """
+    Roll holdings and net cash flows forward day by day after start_date.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        start_date: Last date already covered; only later transactions are applied
+        start_holdings: Series of quantities by symbol as of start_date
+        end_date: Last date to compute
+        start_trade_prices: Series of last trade prices by symbol as of start_date
+
+    Returns:
+        tuple: (holdings DataFrame, flows Series, last trade prices DataFrame) indexed by day
+    """
+    dates = pd.date_range(start=start_date + pd.Timedelta(days=1), end=end_date, freq='D')
+
+    tx = transactions_df.loc[
+        (transactions_df['Date'] > start_date) & (transactions_df['Date'] <= end_date)
+    ]
+    is_buy = tx['Type'] == 'BUY'
+    signed_quantity = tx['Quantity'].where(is_buy, -tx['Quantity'])
+    # Net money put into the portfolio: buys in, sells out
+    net_flow = (tx['Quantity'] * tx['Price']).where(is_buy, -tx['Quantity'] * tx['Price'])
+
+    deltas = (
+        signed_quantity.groupby([tx['Date'], tx['Symbol']]).sum()
+        .unstack(fill_value=0.0)
+    )
+    symbols = start_holdings.index.union(deltas.columns)
+    deltas = deltas.reindex(index=dates, columns=symbols, fill_value=0.0)
+
+    holdings = deltas.cumsum() + start_holdings.reindex(symbols, fill_value=0.0)
+    flows = net_flow.groupby(tx['Date']).sum().reindex(dates, fill_value=0.0)
+    trade_prices = _last_trade_prices(tx, dates, symbols, start_trade_prices)
+
+    return holdings, flows, trade_prices
+
+def _prepare_ledger(transactions_df, since=None):
+    """
+    Normalize ledger dates and drop rows without a valid date.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        since: Optional date; only rows after it are kept, before copying
+    """
+    dates = pd.to_datetime(transactions_df['Date'])
+    rows = dates.notna()
+    if since is not None:
+        rows &= dates >= since + pd.Timedelta(days=1)
+    ledger = transactions_df.loc[rows, ['Symbol', 'Date', 'Type', 'Quantity', 'Price']]
+    return ledger.assign(Date=dates[rows].dt.normalize())
+
+def _with_checkpoints(timeline, since=None):
+    """Record month-end snapshots for the part of the timeline after since"""
+    holdings = timeline['holdings']
+    month_ends = holdings.index[holdings.index.is_month_end]
+    if since is not None:
+        month_ends = month_ends[month_ends > since]
+
+    new_checkpoints = pd.DataFrame({
+        'Value': timeline['value'].reindex(month_ends),
+        'TWR Index': timeline['twr_index'].reindex(month_ends)
+    })
+    new_holdings = holdings.reindex(month_ends)
+    new_trade_prices = timeline['trade_prices'].reindex(month_ends)
+
+    if since is None:
+        timeline['checkpoints'] = new_checkpoints
+        timeline['checkpoint_holdings'] = new_holdings
+        timeline['checkpoint_trade_prices'] = new_trade_prices
+    else:
+        kept = timeline['checkpoints'].index <= since
+        timeline['checkpoints'] = pd.concat([timeline['checkpoints'][kept], new_checkpoints])
+        timeline['checkpoint_holdings'] = pd.concat(
+            [timeline['checkpoint_holdings'][kept], new_holdings]
+        ).fillna(0.0)
+        timeline['checkpoint_trade_prices'] = pd.concat(
+            [timeline['checkpoint_trade_prices'][kept], new_trade_prices]
+        )
+    return timeline
+
+def build_timeline(transactions_df, prices=None, end_date=None, price_store=None):
+    """
+    Build daily holdings, value and time-weighted return series from the first trade.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        prices: Dictionary of {symbol: price} or DataFrame of prices by date and symbol
+        end_date: Last date of the series (default today)
+        price_store: Optional PriceStore of historical closes
+
+    Returns:
+        dict: Timeline with 'holdings', 'flows', 'value', 'twr_index' series and
+        month-end 'checkpoints' with the holdings and last trade prices at each,
+        or None if there are no dated transactions
+    """
+    if transactions_df is None or transactions_df.empty:
+        return None
+
+    ledger = _prepare_ledger(transactions_df)
+    if ledger.empty:
+        return None
+
+    end_date = pd.Timestamp(end_date or pd.Timestamp.now()).normalize()
+    start_date = ledger['Date'].min() - pd.Timedelta(days=1)
+
+    holdings, flows, trade_prices = _compute_segment(
+        ledger, start_date, pd.Series(dtype=float), end_date, pd.Series(dtype=float)
+    )
+    value = _value_holdings(holdings, prices, price_store, trade_prices)
+
+    timeline = {
+        'holdings': holdings,
+        'flows': flows,
+        'trade_prices': trade_prices,
+        'value': value,
+        'twr_index': _growth_index(value, flows, 0.0, 1.0),
+        'prices_key': _prices_key(prices, price_store)
+    }
+    return _with_checkpoints(timeline)
+
+def update_timeline(timeline, transactions_df, changed_from=None, prices=None, end_date=None,
+                    price_store=None):
+    """
+    Bring a timeline up to date after a ledger edit, a price change or a new day.
+
+    Only the tail after the last checkpoint before changed_from is recomputed and
+    appended to the existing series; a price change revalues the stored holdings
+    without walking the ledger again.
+
+    Args:
+        timeline: Timeline returned by build_timeline or update_timeline
+        transactions_df: DataFrame containing transactions (after the edit)
+        changed_from: Earliest transaction date affected by the edit, if any
+        prices: Dictionary of {symbol: price} or DataFrame of prices by date and symbol
+        end_date: Last date of the series (default today)
+        price_store: Optional PriceStore of historical closes
+
+    Returns:
+        dict: Updated timeline
+    """
+    if timeline is None or transactions_df is None or transactions_df.empty:
+        return build_timeline(transactions_df, prices, end_date, price_store)
+
+    end_date = pd.Timestamp(end_date or pd.Timestamp.now()).normalize()
+    last_date = timeline['holdings'].index[-1]
+
+    # A new day extends the series from the last computed date
+    if changed_from is None:
+        if last_date >= end_date:
+            if _prices_key(prices, price_store) != timeline['prices_key']:
+                return _revalue_timeline(timeline, prices, price_store)
+            return timeline
+        changed_from = last_date + pd.Timedelta(days=1)
+    changed_from = min(pd.Timestamp(changed_from).normalize(), last_date + pd.Timedelta(days=1))
+
+    # A checkpoint on the last date was valued at current prices, not trade prices
+    checkpoints = timeline['checkpoints'].index
+    earlier = checkpoints[checkpoints < min(changed_from, last_date)]
+    if len(earlier) == 0:
+        return build_timeline(transactions_df, prices, end_date, price_store)
+
+    if _prices_key(prices, price_store) != timeline['prices_key']:
+        timeline = _revalue_timeline(timeline, prices, price_store)
+
+    checkpoint_date = earlier[-1]
+    checkpoint = timeline['checkpoints'].loc[checkpoint_date]
+    start_holdings = timeline['checkpoint_holdings'].loc[checkpoint_date]
+    start_trade_prices = timeline['checkpoint_trade_prices'].loc[checkpoint_date]
+
+    # Only rows after the checkpoint are read; earlier ones are summarized in it
+    tail_holdings, tail_flows, tail_trade_prices = _compute_segment(
+        _prepare_ledger(transactions_df, since=checkpoint_date),
+        checkpoint_date, start_holdings, end_date, start_trade_prices
+    )
+    tail_value = _value_holdings(tail_holdings, prices, price_store, tail_trade_prices)
+    tail_index = _growth_index(
+        tail_value, tail_flows, checkpoint['Value'], checkpoint['TWR Index']
+    )
+
+    head = timeline['holdings'].index <= checkpoint_date
+    timeline = {
+        'holdings': pd.concat([timeline['holdings'][head], tail_holdings]).fillna(0.0),
+        'flows': pd.concat([timeline['flows'][head], tail_flows]),
+        'trade_prices': pd.concat([timeline['trade_prices'][head], tail_trade_prices]),
+        'value': pd.concat([timeline['value'][head], tail_value]),
+        'twr_index': pd.concat([timeline['twr_index'][head], tail_index]),
+        'prices_key': timeline['prices_key'],
+        'checkpoints': timeline['checkpoints'],
+        'checkpoint_holdings': timeline['checkpoint_holdings'],
+        'checkpoint_trade_prices': timeline['checkpoint_trade_prices']
+    }
+    return _with_checkpoints(timeline, since=checkpoint_date)
+
+def _revalue_timeline(timeline, prices, price_store=None):
+    """Revalue stored holdings with new prices without walking the ledger"""
+    value = _value_holdings(timeline['holdings'], prices, price_store, timeline['trade_prices'])
+    timeline = dict(timeline)
+    timeline['value'] = value
+    timeline['twr_index'] = _growth_index(value, timeline['flows'], 0.0, 1.0)
+    timeline['prices_key'] = _prices_key(prices, price_store)
+    return _with_checkpoints(timeline)
+
+def timeline_twr(timeline):
+    """
+    Time-weighted return over the whole timeline.
+
+    Args:
+        timeline: Timeline returned by build_timeline or update_timeline
+
+    Returns:
+        float: TWR value, None if the timeline is empty
+    """
+    if timeline is None or timeline['twr_index'].empty:
+        return None
+    return float(timeline['twr_index'].iloc[-1] - 1)
+
+def allocation_weights(timeline, prices=None, price_store=None, freq=None):
+    """
+    Portfolio weight of each symbol over time.
+
+    Holdings are valued as one date x symbol matrix and normalized by each
+    date's total, so no per-date portfolio calculation is repeated.
+
+    Args:
+        timeline: Timeline returned by build_timeline or update_timeline
+        prices: Dictionary of {symbol: price} or DataFrame of prices by date and symbol
+        price_store: Optional PriceStore of historical closes
+        freq: Optional pandas offset alias (e.g. 'W', 'ME'); weights are taken
+            on the last day of each period instead of daily
+
+    Returns:
+        DataFrame of weights (summing to 1 per date) indexed by date, one column
+        per symbol ever held; dates with no valued holdings are dropped
+    """
+    if timeline is None or timeline['holdings'].empty:
+        return pd.DataFrame()
+
+    holdings = timeline['holdings']
+    if freq is not None:
+        # Sample on the last actual date of each period so no future dates appear
+        period_ends = holdings.index.to_series().resample(freq).last().dropna()
+        holdings = holdings.loc[pd.DatetimeIndex(period_ends)]
+
+    values = _position_values(holdings, prices, price_store, timeline['trade_prices'])
+    values = values.loc[:, (values > 0).any()]
+    totals = values.sum(axis=1)
+    return values[totals > 0].div(totals[totals > 0], axis=0)
+
+def allocation_drift(weights):
+    """
+    Summarize how allocation weights moved over a weights timeline.
+
+    Args:
+        weights: DataFrame returned by allocation_weights
+
+    Returns:
+        tuple: (DataFrame per symbol with Start, Current, Change, Min, Max,
+        Mean and Std weights; Series of turnover per period, half the sum of
+        absolute weight changes)
+    """
+    if weights.empty:
+        return pd.DataFrame(), pd.Series(dtype=float)
+
+    summary = pd.DataFrame({
+        'Start': weights.iloc[0],
+        'Current': weights.iloc[-1],
+        'Change': weights.iloc[-1] - weights.iloc[0],
+        'Min': weights.min(),
+        'Max': weights.max(),
+        'Mean': weights.mean(),
+        'Std': weights.std()
+    })
+    turnover = weights.diff().abs().sum(axis=1).iloc[1:] / 2
+    return summary, turnover
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+NS_PER_YEAR = 365 * NS_PER_DAY
+
+FALLBACK_GUESSES = (0.1, 0.0, 0.2, -0.1, 0.5)
+
+# Rates scanned for a sign change when every Newton start fails
+BRACKET_GRID = np.concatenate([np.linspace(-0.99, 1.0, 200), np.geomspace(1.0, 100.0, 50)[1:]])
+
+def _newton(amounts, years, guess, tol=0.00001, maxiter=100):
+    """Newton iterations on XNPV with its analytic derivative; None if they diverge"""
+    rate = guess
+    for _ in range(maxiter):
+        if rate <= -1:
+            return None
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            discount = (1 + rate) ** -years
+            npv = np.sum(amounts * discount)
+            slope = np.sum(-years * amounts * discount) / (1 + rate)
+            step = npv / slope
+        if not np.isfinite(npv) or not np.isfinite(slope) or slope == 0:
+            return None
+        rate -= step
+        if abs(step) < tol:
+            return rate if np.isfinite(rate) and rate > -1 else None
+    return None
+
+def _bracketed(amounts, years):
+    """Find a sign change of XNPV over a rate grid and refine it with Brent's method"""
+    from scipy.optimize import brentq
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        npv = ((1 + BRACKET_GRID)[:, None] ** -years[None, :]) @ amounts
+    finite = np.isfinite(npv)
+    signs = np.sign(npv)
+    crossings = np.flatnonzero(finite[:-1] & finite[1:] & (signs[:-1] * signs[1:] < 0))
+    if len(crossings) == 0:
+        return None
+
+    # Prefer the root closest to zero when XNPV changes sign more than once
+    lo = crossings[np.argmin(np.abs(BRACKET_GRID[crossings]))]
+    return brentq(
+        lambda r: np.sum(amounts * (1 + r) ** -years),
+        BRACKET_GRID[lo], BRACKET_GRID[lo + 1], xtol=0.00001
+    )
+
+def solve_xirr(amounts, years, warm_start=None):
+    """
+    Solve XIRR, starting from a previous solution when one is available.
+
+    Newton's method is tried from warm_start first, then from each fallback
+    guess, and finally the root is bracketed on a rate grid.
+
+    Args:
+        amounts: Cash flow amounts
+        years: Years since the first cash flow, same length as amounts
+        warm_start: Optional rate to start from, e.g. the last converged XIRR
+
+    Returns:
+        float: XIRR value, None if there are too few flows or no root is found
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.asarray(years, dtype=float)
+    if len(amounts) < 2 or not np.all(np.isfinite(amounts)):  # Need at least 2 cash flows
+        return None
+
+    guesses = FALLBACK_GUESSES if warm_start is None else (warm_start,) + FALLBACK_GUESSES
+    for guess in guesses:
+        rate = _newton(amounts, years, guess)
+        if rate is not None:
+            return float(rate)
+
+    rate = _bracketed(amounts, years)
+    return None if rate is None else float(rate)
+
+def _signed_flows(ledger):
+    """
+    Cash flow amounts, normalized dates (int64 ns) and signed quantities of ledger
+    rows. Rows without a valid date are left out, as in the timeline.
+    """
+    ledger = ledger[pd.to_datetime(ledger['Date']).notna().to_numpy()]
+    quantity = ledger['Quantity'].to_numpy(dtype=float)
+    price = ledger['Price'].to_numpy(dtype=float)
+    is_buy = (ledger['Type'] == 'BUY').to_numpy()
+    dates = pd.to_datetime(ledger['Date']).to_numpy('datetime64[ns]').astype(np.int64)
+
+    amounts = np.where(is_buy, -quantity * price, quantity * price)
+    signed_quantity = pd.Series(np.where(is_buy, quantity, -quantity)).groupby(
+        ledger['Symbol'].to_numpy()
+    ).sum()
+    return amounts, dates - dates % NS_PER_DAY, signed_quantity
+
+def _row_fingerprint(ledger, position):
+    """Identity of one ledger row, used to detect edits before the cached position"""
+    return tuple(ledger.iloc[position][['Symbol', 'Date', 'Type', 'Quantity', 'Price']])
+
+def calculate_xirr_incremental(transactions_df, cache, current_prices, symbol=None, account='default'):
+    """
+    Calculate portfolio or symbol XIRR, reusing cached cash-flow arrays and the
+    last converged rate for (account, symbol).
+
+    Rows appended since the last call are converted and added to the cached
+    arrays; a price change only replaces the terminal value. The solver then
+    starts from the previous rate, so a small change converges in a few steps.
+
+    Args:
+        transactions_df: DataFrame containing transactions
+        cache: Mutable dictionary holding solver state between calls
+        current_prices: Dictionary of {symbol: price}
+        symbol: Optional stock symbol to filter transactions
+        account: Identifier of the ledger the transactions belong to
+
+    Returns:
+        float: XIRR value, None if it cannot be calculated
+    """
+    if transactions_df is None or transactions_df.empty:
+        return None
+
+    key = (account, symbol)
+    entry = cache.get(key)
+    consumed = 0 if entry is None else entry['rows']
+    if entry is not None and (
+        consumed > len(transactions_df)
+        or (consumed and _row_fingerprint(transactions_df, consumed - 1) != entry['last_row'])
+    ):
+        entry, consumed = None, 0
+
+    new_rows = transactions_df.iloc[consumed:]
+    if symbol:
+        new_rows = new_rows[new_rows['Symbol'] == symbol]
+    amounts, dates, signed_quantity = _signed_flows(new_rows)
+
+    if entry is None:
+        entry = {
+            'amounts': amounts,
+            'dates': dates,
+            'holdings': signed_quantity,
+            'rate': None
+        }
+    elif len(amounts):
+        entry['amounts'] = np.concatenate([entry['amounts'], amounts])
+        entry['dates'] = np.concatenate([entry['dates'], dates])
+        entry['holdings'] = entry['holdings'].add(signed_quantity, fill_value=0)
+    entry['rows'] = len(transactions_df)
+    entry['last_row'] = _row_fingerprint(transactions_df, len(transactions_df) - 1)
+    cache[key] = entry
+
+    flow_amounts = entry['amounts']
+    flow_dates = entry['dates']
+    held = entry['holdings'][entry['holdings'] > 0]
+    if len(held):
+        # Unpriced holdings contribute nothing, as in calculate_portfolio_value(...).sum()
+        quotes = held.index.map(lambda s: current_prices.get(s, np.nan)).to_numpy(dtype=float)
+        terminal_value = np.nansum(held.to_numpy() * quotes)
+        now = pd.Timestamp.now().normalize().value
+        flow_amounts = np.append(flow_amounts, terminal_value)
+        flow_dates = np.append(flow_dates, now)
+    if len(flow_dates) == 0:
+        return None
+
+    years = (flow_dates - flow_dates[0]) / NS_PER_YEAR
+    rate = solve_xirr(flow_amounts, years, warm_start=entry['rate'])
+    if rate is not None:
+        entry['rate'] = rate
+    return rate
+
+def invalidate_xirr_cache(cache, account=None, symbols=None):
+    """
+    Drop cached solver state after an edit that is not a plain append.
+
+    Args:
+        cache: Solver state dictionary
+        account: Only drop entries for this account (default all accounts)
+        symbols: Only drop these symbols' entries, plus the portfolio-wide entry
+    """
+    for key in list(cache):
+        entry_account, entry_symbol = key
+        if account is not None and entry_account != account:
+            continue
+        if symbols is not None and entry_symbol is not None and entry_symbol not in symbols:
+            continue
+        del cache[key]